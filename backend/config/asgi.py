@@ -5,6 +5,15 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+As leituras públicas em /api/async/producers/ (core.async_views) usam o ORM
+assíncrono e só liberam o worker durante o I/O do banco quando servidas por
+aqui, por exemplo: uvicorn config.asgi:application --workers 4
+
+O stream de eventos dos pedidos (/api/stream/orders/, SSE) também precisa do
+ASGI: cada conexão aberta é só uma tarefa no event loop, e uma única consulta
+por worker atende todos os dashboards conectados. Os eventos são gerados pelo
+worker do outbox (python manage.py run_outbox_worker).
 """
 
 import os
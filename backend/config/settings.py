@@ -105,6 +105,68 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND=locmem (padrão, por processo) ou file (compartilhado entre workers da mesma máquina)
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'healthy-food',
+        }
+    }
+
+# Tempo (segundos) que as respostas públicas do catálogo ficam em cache
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+
+# Métricas por requisição (consultas SQL, tempo de banco, renderização e total)
+# REQUEST_METRICS=True liga o middleware: cabeçalho Server-Timing, log 'core.metrics'
+# e GET /api/metrics/requests/ (admin). Com REQUEST_METRICS_STRICT=True, passar do
+# orçamento de consultas da rota levanta QueryBudgetExceeded (para testes).
+REQUEST_METRICS = config('REQUEST_METRICS', default=False, cast=bool)
+REQUEST_METRICS_STRICT = config('REQUEST_METRICS_STRICT', default=False, cast=bool)
+
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'core.instrumentation.RequestMetricsMiddleware')
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {'console': {'class': 'logging.StreamHandler'}},
+        'loggers': {'core.metrics': {'handlers': ['console'], 'level': 'INFO'}},
+    }
+
+# Máximo de consultas SQL por rota (nome da URL); chamadas de lista não podem crescer com a página
+REQUEST_QUERY_BUDGETS = {
+    # Catálogo público (anônimo)
+    'producer-list': 2,
+    'producer-nearby': 2,
+    'producer-detail': 2,
+    'producer-products': 3,
+    'producer-rating-summary': 2,
+    'search': 3,
+    'async-producer-list': 2,
+    'async-producer-detail': 2,
+    'async-producer-products': 3,
+    # Área do produtor (inclui as consultas de autenticação)
+    'product-list': 5,
+    'order-list': 5,
+    'rating-list': 4,
+    'sales-analytics': 5,
+    'my-producer-profile': 5,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -156,17 +218,35 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
+    # JWT primeiro: reconhece o formato do cabeçalho sem tocar no banco; as classes
+    # de core.authentication mantêm o usuário em cache (ver AUTH_USER_CACHE_TTL)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',  # Suporta Token simples
-        'rest_framework_simplejwt.authentication.JWTAuthentication',  # Suporta JWT
+        'core.authentication.ClaimsJWTAuthentication',  # Suporta JWT
+        'core.authentication.CachedTokenAuthentication',  # Suporta Token simples
         'rest_framework.authentication.SessionAuthentication',
     ),
+    # Todas as listagens são paginadas por cursor; cada view pode trocar a classe
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
 REST_USE_JWT = True
 JWT_AUTH_COOKIE = None  # Não usar cookies, apenas headers
 JWT_AUTH_REFRESH_COOKIE = None
 
+# JWTs emitidos pelo dj-rest-auth levam is_staff e producer_profile_id nas claims
+REST_AUTH = {
+    'JWT_TOKEN_CLAIMS_SERIALIZER': 'core.authentication.ClaimsTokenObtainPairSerializer',
+}
+
+# Leituras autenticadas por JWT confiam nas claims assinadas, sem buscar o usuário no banco.
+# Desative para sempre conferir o usuário (ex.: desativações valendo antes do token expirar).
+AUTH_TRUST_JWT_CLAIMS = config('AUTH_TRUST_JWT_CLAIMS', default=True, cast=bool)
+# Rotas (nome da URL) que devolvem os dados do próprio usuário: nelas o usuário vem do cache/banco
+AUTH_CLAIMS_EXCLUDED_URLS = ('rest_user_details',)
+# Segundos que usuário/token ficam no cache em memória de cada processo
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+
 # Configurações do Simple JWT
 from datetime import timedelta
 
@@ -190,8 +270,23 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
+
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.ClaimsTokenObtainPairSerializer',
+    # Blacklist consultada por um filtro de Bloom em memória antes do banco
+    'TOKEN_REFRESH_SERIALIZER': 'core.token_blacklist.CachedBlacklistTokenRefreshSerializer',
 }
 
+# Filtro de Bloom da blacklist de refresh tokens (core.token_blacklist): intervalo (s) para
+# enxergar tokens revogados por outros processos e capacidade inicial do filtro.
+# Rode python manage.py purge_expired_tokens periodicamente (ex.: cron diário).
+TOKEN_BLACKLIST_SYNC_SECONDS = config('TOKEN_BLACKLIST_SYNC_SECONDS', default=2, cast=float)
+TOKEN_BLACKLIST_BLOOM_CAPACITY = config('TOKEN_BLACKLIST_BLOOM_CAPACITY', default=100000, cast=int)
+
+# Consulta anônima de pedidos por telefone (core.throttling): (requisições por minuto, rajada),
+# por IP e no total de cada processo
+ORDER_LOOKUP_RATE = (config('ORDER_LOOKUP_RATE', default=30, cast=int), config('ORDER_LOOKUP_BURST', default=10, cast=int))
+ORDER_LOOKUP_GLOBAL_RATE = (config('ORDER_LOOKUP_GLOBAL_RATE', default=600, cast=int), config('ORDER_LOOKUP_GLOBAL_BURST', default=100, cast=int))
+
 # Configuração para que o email seja usado para login
 ACCOUNT_EMAIL_REQUIRED = True
 ACCOUNT_USERNAME_REQUIRED = False
@@ -1,15 +1,17 @@
 # backend/config/urls.py
 from django.contrib import admin
 from django.urls import path, re_path, include
-from core.views import index, ProducerRegisterView, ProductViewSet, ProducerListView, ProducerDetailView, ProducerProductsView, OrderViewSet, MyProducerProfileView, RatingViewSet
+from core.views import index, ProducerRegisterView, ProductViewSet, ProducerListView, ProducerDetailView, ProducerProductsView, ProducerRatingSummaryView, OrderViewSet, MyProducerProfileView, RatingViewSet, SearchView, ProducerNearbyView, SalesAnalyticsView, RequestMetricsView, NotificationViewSet
+from core import async_views
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
-# Crie um router para a API de produtos, pedidos e avaliações
+# Crie um router para a API de produtos, pedidos, avaliações e notificações
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'ratings', RatingViewSet, basename='rating')
+router.register(r'notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,9 +19,21 @@ urlpatterns = [
     path('api/', include(router.urls)),
 
     path('api/producers/', ProducerListView.as_view(), name='producer-list'),
+    path('api/producers/nearby/', ProducerNearbyView.as_view(), name='producer-nearby'),
     path('api/producers/<int:pk>/', ProducerDetailView.as_view(), name='producer-detail'),
     path('api/producers/<int:pk>/products/', ProducerProductsView.as_view(), name='producer-products'),
+    path('api/producers/<int:pk>/ratings/summary/', ProducerRatingSummaryView.as_view(), name='producer-rating-summary'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    # Leituras públicas do catálogo com ORM assíncrono (servidas pelo config.asgi)
+    path('api/async/producers/', async_views.producer_list, name='async-producer-list'),
+    path('api/async/producers/<int:pk>/', async_views.producer_detail, name='async-producer-detail'),
+    path('api/async/producers/<int:pk>/products/', async_views.producer_products, name='async-producer-products'),
+    # Eventos de pedidos do produtor (SSE, servido pelo config.asgi)
+    path('api/stream/orders/', async_views.order_stream, name='order-stream'),
+
     path('api/my-profile/', MyProducerProfileView.as_view(), name='my-producer-profile'),
+    path('api/analytics/sales/', SalesAnalyticsView.as_view(), name='sales-analytics'),
+    path('api/metrics/requests/', RequestMetricsView.as_view(), name='request-metrics'),
 
     path('api/auth/', include('dj_rest_auth.urls')),
     path('api/auth/registration/', include('dj_rest_auth.registration.urls')),
@@ -0,0 +1,193 @@
+# backend/core/analytics.py
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import Order, OrderItem, ProducerSalesDaily, ProductSalesDaily
+
+# Status finais que entram nos resumos
+TRACKED_STATUSES = ('Entregue', 'Cancelado')
+
+
+def _empty_deltas():
+    return defaultdict(int)
+
+
+def _order_deltas(statuses, sign, producer_deltas, product_deltas, product_names):
+    """
+    Soma (ou subtrai, com sign=-1) o efeito dos pedidos nos resumos do dia de criação.
+    'statuses' é {id do pedido: status final considerado}.
+    """
+    order_ids = list(statuses)
+    orders = Order.objects.filter(id__in=order_ids).values_list('id', 'producer_id', 'created_at', 'total_price')
+    order_info = {}
+    for order_id, producer_id, created_at, total_price in orders:
+        day = timezone.localdate(created_at)
+        status = statuses[order_id]
+        order_info[order_id] = (producer_id, day, status)
+        deltas = producer_deltas[(producer_id, day)]
+        if status == 'Entregue':
+            deltas['delivered_orders'] += sign
+            deltas['revenue'] += sign * total_price
+        else:
+            deltas['cancelled_orders'] += sign
+            deltas['cancelled_value'] += sign * total_price
+
+    items = OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        'order_id', 'product_id', 'product_name', 'quantity', 'subtotal'
+    )
+    # Um pedido pode ter várias linhas do mesmo produto: ele conta uma vez como pedido
+    # (como o Count distinct do rebuild_rollups), mas quantidades e valores somam todas
+    counted = set()
+    for order_id, product_id, product_name, quantity, subtotal in items:
+        producer_id, day, status = order_info[order_id]
+        product_names[product_id] = product_name
+        deltas = product_deltas[(producer_id, product_id, day)]
+        first_line = (order_id, product_id) not in counted
+        counted.add((order_id, product_id))
+        if status == 'Entregue':
+            deltas['delivered_orders'] += sign * first_line
+            deltas['quantity'] += sign * quantity
+            deltas['revenue'] += sign * subtotal
+        else:
+            deltas['cancelled_orders'] += sign * first_line
+            deltas['cancelled_quantity'] += sign * quantity
+
+
+def _apply(model, key_fields, deltas, defaults=None):
+    """Garante a linha de cada chave e aplica os incrementos com F(), sem ler antes."""
+    rows = []
+    for key in deltas:
+        values = dict(zip(key_fields, key))
+        rows.append(model(**values, **(defaults(values) if defaults else {})))
+    # Linhas zeradas para as chaves novas; as existentes são ignoradas pela constraint única
+    model.objects.bulk_create(rows, ignore_conflicts=True)
+    for key, changes in deltas.items():
+        changes = {field: value for field, value in changes.items() if value}
+        if changes:
+            model.objects.filter(**dict(zip(key_fields, key))).update(
+                **{field: F(field) + value for field, value in changes.items()}
+            )
+
+
+def record_status_change(previous_statuses, new_status):
+    """
+    Atualiza os resumos diários depois que pedidos mudaram para new_status.
+    'previous_statuses' é {id do pedido: status anterior}. Pedidos que saem de
+    Entregue/Cancelado (reabertos) são descontados; os que entram são somados.
+    Deve rodar na mesma transação da mudança de status.
+    """
+    leaving = {
+        order_id: previous for order_id, previous in previous_statuses.items()
+        if previous in TRACKED_STATUSES and previous != new_status
+    }
+    entering = {
+        order_id: new_status for order_id, previous in previous_statuses.items()
+        if new_status in TRACKED_STATUSES and previous != new_status
+    }
+    if not leaving and not entering:
+        return
+
+    producer_deltas = defaultdict(_empty_deltas)
+    product_deltas = defaultdict(_empty_deltas)
+    product_names = {}
+    if leaving:
+        _order_deltas(leaving, -1, producer_deltas, product_deltas, product_names)
+    if entering:
+        _order_deltas(entering, 1, producer_deltas, product_deltas, product_names)
+
+    _apply(ProducerSalesDaily, ('producer_id', 'day'), producer_deltas)
+    _apply(
+        ProductSalesDaily, ('producer_id', 'product_id', 'day'), product_deltas,
+        defaults=lambda values: {'product_name': product_names[values['product_id']]},
+    )
+
+
+def rebuild_rollups(producer_id=None):
+    """Recalcula os resumos a partir dos pedidos (backfill); retorna quantas linhas foram gravadas."""
+    orders = Order.objects.filter(status__in=TRACKED_STATUSES)
+    items = OrderItem.objects.filter(order__status__in=TRACKED_STATUSES)
+    if producer_id is not None:
+        orders = orders.filter(producer_id=producer_id)
+        items = items.filter(order__producer_id=producer_id)
+
+    producer_rows = {}
+    order_totals = (
+        orders.annotate(day=TruncDate('created_at'))
+        .values('producer_id', 'day', 'status')
+        .annotate(orders=Count('id'), total=Sum('total_price'))
+        .order_by()
+    )
+    for row in order_totals:
+        key = (row['producer_id'], row['day'])
+        summary = producer_rows.setdefault(key, ProducerSalesDaily(producer_id=key[0], day=key[1]))
+        if row['status'] == 'Entregue':
+            summary.delivered_orders, summary.revenue = row['orders'], row['total']
+        else:
+            summary.cancelled_orders, summary.cancelled_value = row['orders'], row['total']
+
+    product_rows = {}
+    item_totals = (
+        items.annotate(day=TruncDate('order__created_at'))
+        .values('order__producer_id', 'product_id', 'day', 'order__status')
+        .annotate(
+            orders=Count('order_id', distinct=True), quantity=Sum('quantity'),
+            revenue=Sum('subtotal'), name=Max('product_name'),
+        )
+        .order_by()
+    )
+    for row in item_totals:
+        key = (row['product_id'], row['day'])
+        summary = product_rows.setdefault(key, ProductSalesDaily(
+            producer_id=row['order__producer_id'], product_id=key[0], day=key[1], product_name=row['name'],
+        ))
+        if row['order__status'] == 'Entregue':
+            summary.delivered_orders, summary.quantity, summary.revenue = row['orders'], row['quantity'], row['revenue']
+        else:
+            summary.cancelled_orders, summary.cancelled_quantity = row['orders'], row['quantity']
+
+    with transaction.atomic():
+        existing_producers = ProducerSalesDaily.objects.all()
+        existing_products = ProductSalesDaily.objects.all()
+        if producer_id is not None:
+            existing_producers = existing_producers.filter(producer_id=producer_id)
+            existing_products = existing_products.filter(producer_id=producer_id)
+        existing_producers.delete()
+        existing_products.delete()
+        ProducerSalesDaily.objects.bulk_create(producer_rows.values(), batch_size=1000)
+        ProductSalesDaily.objects.bulk_create(product_rows.values(), batch_size=1000)
+
+    return len(producer_rows) + len(product_rows)
+
+
+def sales_summary(producer, start, end, top=10):
+    """Totais, série diária e produtos mais vendidos do produtor entre start e end (inclusive)."""
+    days = ProducerSalesDaily.objects.filter(producer=producer, day__range=(start, end))
+    daily = list(days.values('day', 'delivered_orders', 'revenue', 'cancelled_orders', 'cancelled_value'))
+
+    totals = {'delivered_orders': 0, 'revenue': Decimal('0'), 'cancelled_orders': 0, 'cancelled_value': Decimal('0')}
+    for row in daily:
+        for field in totals:
+            totals[field] += row[field]
+    finished = totals['delivered_orders'] + totals['cancelled_orders']
+    totals['cancellation_rate'] = round(totals['cancelled_orders'] / finished, 4) if finished else 0.0
+    totals['average_ticket'] = (
+        (totals['revenue'] / totals['delivered_orders']).quantize(Decimal('0.01'))
+        if totals['delivered_orders'] else Decimal('0.00')
+    )
+
+    top_products = list(
+        ProductSalesDaily.objects.filter(producer=producer, day__range=(start, end))
+        .values('product_id')
+        .annotate(
+            product_name=Max('product_name'), delivered_orders=Sum('delivered_orders'),
+            quantity=Sum('quantity'), revenue=Sum('revenue'),
+            cancelled_orders=Sum('cancelled_orders'), cancelled_quantity=Sum('cancelled_quantity'),
+        )
+        .order_by('-revenue', '-quantity', 'product_id')[:top]
+    )
+
+    return {'start': start, 'end': end, 'totals': totals, 'daily': daily, 'top_products': top_products}
@@ -0,0 +1,274 @@
+# backend/core/async_views.py
+
+"""
+Versões assíncronas (ASGI) das leituras públicas do catálogo.
+Mesmos dados e serializers das views DRF, mas consultando o banco com o ORM
+assíncrono (aget/aiterator), para que os workers ASGI não fiquem bloqueados
+esperando o banco durante picos de acesso anônimo.
+Aqui também fica o stream de eventos (SSE) dos pedidos do produtor.
+"""
+
+import asyncio
+import base64
+import json
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from . import catalog_cache
+from .events import get_broker
+from .geo import city_key
+from .models import ProducerNotification, ProducerProfile, Product
+from .pagination import ProducerCursorPagination, ProductCursorPagination
+from .serializers import ProducerProfileSerializer, ProductSerializer
+
+
+def _encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise TypeError('esperado texto')
+    return value
+
+
+def _decode_cursor(request, parse_key):
+    """
+    Posição [chave de ordenação, pk] gravada no cursor; parse_key converte a chave.
+    Qualquer cursor fora desse formato gera InvalidCursor (400), como o 'Invalid cursor' do DRF.
+    """
+    raw = request.GET.get('cursor')
+    if not raw:
+        return None
+    try:
+        key, pk = json.loads(base64.urlsafe_b64decode(raw.encode()))
+        if isinstance(pk, bool) or not isinstance(pk, int):
+            raise TypeError('pk deve ser inteiro')
+        return parse_key(key), pk
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def _invalid_cursor():
+    return JsonResponse({"detail": "Cursor inválido."}, status=400)
+
+
+def _page_size(request, pagination_class):
+    try:
+        size = int(request.GET.get(pagination_class.page_size_query_param, pagination_class.page_size))
+    except ValueError:
+        size = pagination_class.page_size
+    return max(1, min(size, pagination_class.max_page_size))
+
+
+def _next_link(request, position):
+    query = request.GET.copy()
+    query['cursor'] = _encode_cursor(position)
+    return request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+
+
+async def _paginate(request, queryset, page_size, position_of):
+    """Keyset: busca uma linha a mais para saber se existe próxima página."""
+    rows = [row async for row in queryset[:page_size + 1].aiterator()]
+    next_link = _next_link(request, position_of(rows[page_size - 1])) if len(rows) > page_size else None
+    return rows[:page_size], next_link
+
+
+async def _cached_json(request, scope, producer_id, name, build):
+    """Mesma política de cache/ETag do CatalogCacheMixin, com o cache assíncrono."""
+    key = catalog_cache.response_key(request, scope, producer_id, name)
+    cached = await cache.aget(key)
+    if cached is None:
+        data = await build()
+        if data is None:
+            return JsonResponse({"detail": "Não encontrado."}, status=404)
+        cached = (data, catalog_cache.compute_etag(data))
+        await cache.aset(key, cached, catalog_cache.cache_timeout())
+
+    data, etag = cached
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse(data, safe=False)
+    response['ETag'] = etag
+    return response
+
+
+async def producer_list(request):
+    """GET /api/async/producers/ — equivalente assíncrono de ProducerListView."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        position = _decode_cursor(request, _text)
+    except InvalidCursor:
+        return _invalid_cursor()
+
+    async def build():
+        queryset = ProducerProfile.objects.directory()
+        city = request.GET.get('city')
+        if city:
+            queryset = queryset.filter(city_key=city_key(city))
+        if position:
+            name, pk = position
+            queryset = queryset.filter(Q(name__gt=name) | Q(name=name, pk__gt=pk))
+
+        producers, next_link = await _paginate(
+            request,
+            queryset.order_by('name', 'id'),
+            _page_size(request, ProducerCursorPagination),
+            lambda producer: [producer.name, producer.pk],
+        )
+        return {
+            'next': next_link,
+            'previous': None,
+            'results': ProducerProfileSerializer(producers, many=True).data,
+        }
+
+    return await _cached_json(request, catalog_cache.DIRECTORY_SCOPE, None, 'async-producer-list', build)
+
+
+async def producer_detail(request, pk):
+    """GET /api/async/producers/<pk>/ — equivalente assíncrono de ProducerDetailView."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    async def build():
+        try:
+            producer = await ProducerProfile.objects.with_categories().aget(pk=pk)
+        except ProducerProfile.DoesNotExist:
+            return None
+        return ProducerProfileSerializer(producer).data
+
+    return await _cached_json(request, catalog_cache.PRODUCER_SCOPE, pk, 'async-producer-detail', build)
+
+
+async def producer_products(request, pk):
+    """GET /api/async/producers/<pk>/products/ — equivalente assíncrono de ProducerProductsView."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    try:
+        position = _decode_cursor(request, datetime.fromisoformat)
+    except InvalidCursor:
+        return _invalid_cursor()
+
+    async def build():
+        user_id = await ProducerProfile.objects.filter(pk=pk).values_list('user_id', flat=True).afirst()
+        if user_id is None:
+            return {'next': None, 'previous': None, 'results': []}
+
+        queryset = Product.objects.filter(owner_id=user_id)
+        if position:
+            created_at, product_id = position
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=product_id))
+
+        products, next_link = await _paginate(
+            request,
+            queryset.order_by('-created_at', '-id'),
+            _page_size(request, ProductCursorPagination),
+            lambda product: [product.created_at.isoformat(), product.pk],
+        )
+        return {
+            'next': next_link,
+            'previous': None,
+            'results': ProductSerializer(products, many=True).data,
+        }
+
+    return await _cached_json(request, catalog_cache.PRODUCER_SCOPE, pk, 'async-producer-products', build)
+
+
+# Stream de eventos (SSE) do produtor
+
+STREAM_HEARTBEAT = 15  # segundos entre comentários de keep-alive
+STREAM_REPLAY_LIMIT = 500
+STREAM_RETRY_MS = 3000
+STREAM_SENT_IDS = 5000  # ids lembrados por conexão para descartar repetidos
+
+
+async def _stream_user(request):
+    """
+    Autentica com as mesmas classes do DRF (Token, JWT ou sessão).
+    EventSource não envia cabeçalhos, então o token também pode vir em ?token=.
+    """
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        # Mesmo formato que o frontend usa nos cabeçalhos (JWT ou chave do Token do DRF)
+        request.META['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+    def authenticate():
+        drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        try:
+            user = drf_request.user
+        except APIException:
+            return None
+        return user if user.is_authenticated else None
+
+    return await sync_to_async(authenticate)()
+
+
+def _sse_message(notification):
+    data = json.dumps({'kind': notification.kind, **notification.payload}, ensure_ascii=False)
+    return f'id: {notification.id}\nevent: {notification.kind}\ndata: {data}\n\n'
+
+
+async def order_stream(request):
+    """
+    GET /api/stream/orders/ — eventos de pedidos do produtor logado (text/event-stream):
+    'order.created' e 'order.status_changed'. Ao reconectar, o navegador envia
+    Last-Event-ID e recebe o que perdeu. Sirva pelo config.asgi.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse({"detail": "As credenciais de autenticação não foram fornecidas."}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def events():
+        broker = get_broker()
+        # Inscreve antes do replay para não perder o que chegar no meio; ids repetidos são descartados
+        subscription = broker.subscribe(user.pk)
+        # Ids já enviados nesta conexão; o broker pode entregar um id menor que chegou atrasado
+        sent = set()
+        try:
+            yield f'retry: {STREAM_RETRY_MS}\n\n'
+            if last_event_id is not None:
+                missed = ProducerNotification.objects.filter(
+                    producer_id=user.pk, id__gt=last_event_id
+                ).order_by('id')[:STREAM_REPLAY_LIMIT]
+                async for notification in missed:
+                    sent.add(notification.id)
+                    yield _sse_message(notification)
+
+            while not subscription.overflowed:
+                try:
+                    notification = await asyncio.wait_for(subscription.queue.get(), STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                if notification.id not in sent:
+                    if len(sent) >= STREAM_SENT_IDS:
+                        sent.clear()  # o replay já passou; só repetidos recentes importam
+                    sent.add(notification.id)
+                    yield _sse_message(notification)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Desliga o buffer de proxies (nginx) para os eventos saírem na hora
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,188 @@
+# backend/core/authentication.py
+
+"""
+Autenticação com caminho rápido, sem consultar o banco a cada requisição:
+- ClaimsJWTAuthentication: nas leituras (GET/HEAD/OPTIONS) confia nas claims
+  assinadas do JWT (user_id, is_staff, producer_profile_id); nas escritas e nas
+  rotas de AUTH_CLAIMS_EXCLUDED_URLS usa o usuário do cache em memória (TTL curto)
+  e só cai no banco quando ele expira.
+- CachedTokenAuthentication: o Token do DRF (usado pelo login atual) com o mesmo cache.
+O cache é por processo e é limpo pelos sinais de User e Token (core.signals);
+em outros processos a mudança vale depois de AUTH_USER_CACHE_TTL segundos.
+"""
+
+import copy
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import ProducerProfile
+from .token_blacklist import CachedBlacklistRefreshToken
+
+# Token.key do DRF não tem pontos; um JWT sempre tem três partes
+JWT_HEADER_TYPES = {header_type.lower() for header_type in jwt_settings.AUTH_HEADER_TYPES} | {'token'}
+
+# Acima disso, as entradas vencidas são descartadas a cada gravação
+MAX_CACHE_ENTRIES = 10000
+
+
+class _TTLCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+        now = time.monotonic()
+        with self.lock:
+            if len(self.entries) >= MAX_CACHE_ENTRIES:
+                self.entries = {k: entry for k, entry in self.entries.items() if entry[0] >= now}
+            self.entries[key] = (now + ttl, value)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard_matching(self, predicate):
+        with self.lock:
+            for key in [key for key, (_, value) in self.entries.items() if predicate(value)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+_users = _TTLCache()
+_tokens = _TTLCache()
+
+
+def _user_pk(value):
+    """O simplejwt grava o id como texto na claim; o cache e as comparações usam o tipo da pk."""
+    return User._meta.pk.to_python(value)
+
+
+def cached_user(user_id):
+    """Usuário ativo pelo id, do cache ou do banco; cópia para que a requisição não altere o cache."""
+    user_id = _user_pk(user_id)
+    user = _users.get(user_id)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed('Usuário não encontrado.', code='user_not_found')
+        _users.set(user_id, user)
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed('Usuário inativo.', code='user_inactive')
+    return copy.copy(user)
+
+
+def forget_user(user_id):
+    user_id = _user_pk(user_id)
+    _users.discard(user_id)
+    _tokens.discard_matching(lambda token: token.user_id == user_id)
+
+
+def forget_token(key):
+    _tokens.discard(key)
+
+
+def claims_user(token):
+    """
+    Usuário montado só com as claims do token (sem consulta). Serve para filtros
+    (producer=request.user), comparações e permissões; demais campos ficam vazios.
+    """
+    user = User(
+        id=_user_pk(token[jwt_settings.USER_ID_CLAIM]),
+        is_active=True,
+        is_staff=token.get('is_staff', False),
+        is_superuser=token.get('is_superuser', False),
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+    user.producer_profile_id = token.get('producer_profile_id')
+    user.from_claims = True
+    return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Inclui no JWT as claims usadas pelo ClaimsJWTAuthentication."""
+    token_class = CachedBlacklistRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        token['producer_profile_id'] = ProducerProfile.objects.filter(user=user).values_list('pk', flat=True).first()
+        return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT sem consulta ao banco nas leituras. Aceita 'Bearer <jwt>' e também
+    'Token <jwt>' (formato que o frontend envia); 'Token <chave do DRF>' é
+    deixado para o CachedTokenAuthentication.
+    """
+
+    def get_raw_token(self, header):
+        parts = header.split()
+        if len(parts) != 2 or parts[0].decode(errors='ignore').lower() not in JWT_HEADER_TYPES:
+            return None
+        if parts[1].count(b'.') != 2:
+            return None
+        return parts[1]
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if jwt_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('O token não identifica o usuário.')
+        # Tokens emitidos antes das claims extras não têm 'is_staff': usam o cache
+        if self.trust_claims(request) and 'is_staff' in validated_token:
+            return claims_user(validated_token), validated_token
+        return cached_user(validated_token[jwt_settings.USER_ID_CLAIM]), validated_token
+
+    def trust_claims(self, request):
+        """Só leituras, e fora das rotas que serializam o próprio usuário (nome, email...)."""
+        if not getattr(settings, 'AUTH_TRUST_JWT_CLAIMS', True) or request.method not in SAFE_METHODS:
+            return False
+        match = getattr(request, 'resolver_match', None)
+        return match is None or match.url_name not in getattr(settings, 'AUTH_CLAIMS_EXCLUDED_URLS', ())
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication do DRF com cache em memória da chave -> usuário."""
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        # JWT enviado como 'Token <jwt>' já foi tratado (ou rejeitado) pelo ClaimsJWTAuthentication
+        if len(auth) == 2 and auth[1].count(b'.') == 2:
+            return None
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        token = _tokens.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            _tokens.set(key, token)
+            _users.set(user.pk, user)
+        return cached_user(token.user_id), token
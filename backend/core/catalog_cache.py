@@ -0,0 +1,77 @@
+# backend/core/catalog_cache.py
+
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# As chaves em cache carregam um número de versão. Invalidar significa apenas
+# trocar a versão: as entradas antigas (de qualquer página/cursor) deixam de ser
+# lidas e expiram sozinhas, sem precisar saber quais chaves existem.
+DIRECTORY_SCOPE = 'directory'
+PRODUCER_SCOPE = 'producer'
+
+
+def _version_key(scope, producer_id=None):
+    return f'catalog:{scope}:{producer_id}:version' if producer_id else f'catalog:{scope}:version'
+
+
+def _new_version():
+    # Valor baseado no relógio para não reaproveitar versões após uma limpeza do cache
+    return int(time.time() * 1000)
+
+
+def get_version(scope, producer_id=None):
+    key = _version_key(scope, producer_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(scope, producer_id=None):
+    key = _version_key(scope, producer_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), None)
+
+
+def discard_cached_pages(producer_ids=()):
+    """
+    Descarta já (sem esperar commit) as páginas do diretório e dos produtores indicados.
+    Para verificações e benchmarks que precisam do catálogo frio: só as versões mudam,
+    o resto do cache compartilhado (sessões, throttles) continua intacto.
+    """
+    bump_version(DIRECTORY_SCOPE)
+    for producer_id in producer_ids:
+        bump_version(PRODUCER_SCOPE, producer_id)
+
+
+def invalidate_producer(profile_id, directory=True):
+    """Invalida as páginas do produtor (e o diretório) após o commit da transação atual."""
+    def bump():
+        if directory:
+            bump_version(DIRECTORY_SCOPE)
+        if profile_id:
+            bump_version(PRODUCER_SCOPE, profile_id)
+    transaction.on_commit(bump)
+
+
+def response_key(request, scope, producer_id=None, view_name=''):
+    """Chave por endpoint, por produtor e por página (query string inclui o cursor)."""
+    version = get_version(scope, producer_id)
+    query = request.GET.urlencode()
+    return f'catalog:{scope}:{producer_id}:{version}:{view_name}:{request.get_host()}:{query}'
+
+
+def compute_etag(data):
+    payload = json.dumps(data, sort_keys=True, default=str).encode()
+    return '"%s"' % hashlib.md5(payload).hexdigest()
+
+
+def cache_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
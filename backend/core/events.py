@@ -0,0 +1,124 @@
+# backend/core/events.py
+
+"""
+Pub/sub em processo para o stream de eventos (SSE) dos produtores.
+Uma única tarefa por event loop consulta as notificações novas no banco e
+distribui para as conexões abertas; o custo do polling não cresce com o
+número de dashboards conectados no worker.
+Com vários workers do outbox, um id menor pode ser gravado depois de um maior:
+os ids pulados ficam como lacunas e são consultados de novo por GAP_TIMEOUT
+segundos, até aparecerem ou serem dados como perdidos (transação desfeita).
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from collections import defaultdict
+from django.db.models import Max, Q
+from .models import ProducerNotification
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+POLL_BATCH = 500
+# Tempo que um id pulado continua sendo procurado, e quantos ids pulados guardar no máximo
+GAP_TIMEOUT = 30.0
+MAX_GAPS = 1000
+# Eventos acumulados por conexão antes de derrubá-la (o cliente reconecta com Last-Event-ID)
+QUEUE_SIZE = 200
+
+
+class Subscription:
+    def __init__(self, producer_id):
+        self.producer_id = producer_id
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def push(self, notification):
+        try:
+            self.queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class NotificationBroker:
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.subscribers = defaultdict(set)
+        self.last_id = None
+        # id pulado -> instante (monotonic) em que a lacuna foi vista
+        self.gaps = {}
+        self.task = None
+
+    def subscribe(self, producer_id):
+        subscription = Subscription(producer_id)
+        self.subscribers[producer_id].add(subscription)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self._poll())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscribers.get(subscription.producer_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.producer_id]
+
+    async def _poll(self):
+        # A tarefa termina sozinha quando a última conexão fecha
+        while self.subscribers:
+            try:
+                fetched = await self._poll_once()
+            except Exception:
+                # Sem isso as conexões abertas ficariam só com keep-alive; tenta de novo no próximo ciclo
+                logger.exception('Falha ao consultar notificações para o stream; nova tentativa em %.1fs', self.interval)
+                fetched = 0
+            if fetched < POLL_BATCH:
+                await asyncio.sleep(self.interval)
+        # Numa próxima conexão, recomeça do fim da tabela em vez de reprocessar o intervalo parado
+        self.last_id = None
+        self.gaps.clear()
+
+    async def _poll_once(self):
+        if self.last_id is None:
+            # Só o que chegar daqui em diante; o histórico vem do replay de cada conexão
+            aggregate = await ProducerNotification.objects.aaggregate(last=Max('id'))
+            self.last_id = aggregate['last'] or 0
+
+        now = time.monotonic()
+        self.gaps = {gap: seen for gap, seen in self.gaps.items() if now - seen < GAP_TIMEOUT}
+        # Todas as notificações (não só as dos inscritos), para que toda lacuna de id seja real
+        pending = Q(id__gt=self.last_id)
+        if self.gaps:
+            pending |= Q(id__in=list(self.gaps))
+        notifications = [
+            notification async for notification in ProducerNotification.objects
+            .filter(pending).order_by('id')[:POLL_BATCH]
+        ]
+
+        for notification in notifications:
+            if notification.id > self.last_id:
+                skipped = range(max(self.last_id + 1, notification.id - MAX_GAPS), notification.id)
+                self.gaps.update(dict.fromkeys(skipped, now))
+                self.last_id = notification.id
+            else:
+                self.gaps.pop(notification.id, None)
+            for subscription in list(self.subscribers.get(notification.producer_id, ())):
+                subscription.push(notification)
+
+        if len(self.gaps) > MAX_GAPS:
+            self.gaps = dict(sorted(self.gaps.items())[-MAX_GAPS:])
+        return len(notifications)
+
+
+# Um broker por event loop (o servidor ASGI roda um loop por worker)
+_brokers = weakref.WeakKeyDictionary()
+
+
+def get_broker():
+    loop = asyncio.get_running_loop()
+    broker = _brokers.get(loop)
+    if broker is None:
+        broker = _brokers[loop] = NotificationBroker()
+    return broker
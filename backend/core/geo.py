@@ -0,0 +1,74 @@
+# backend/core/geo.py
+
+import csv
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+from .search import strip_accents
+
+# Gazetteer local (cidade, UF, coordenadas do centro): nada de geocodificação pela rede
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.csv'
+
+EARTH_RADIUS_KM = 6371.0
+
+# "Campinas - SP", "Campinas/SP", "Campinas, SP"
+UF_SUFFIX = re.compile(r'\s*[-/,]\s*([a-z]{2})\s*$')
+
+
+def split_city(text):
+    """Normaliza o nome da cidade e separa a UF, se informada: 'Campinas/SP' -> ('campinas', 'sp')."""
+    value = strip_accents(text or '').lower().strip()
+    uf = None
+    match = UF_SUFFIX.search(value)
+    if match:
+        uf = match.group(1)
+        value = value[:match.start()]
+    value = re.sub(r'[^a-z0-9]+', ' ', value).strip()
+    return value, uf
+
+
+def city_key(text):
+    """Chave normalizada da cidade (sem acento, minúsculas, sem UF)."""
+    return split_city(text)[0]
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """Carrega o gazetteer: chave da cidade -> lista de (uf, lat, lon)."""
+    entries = {}
+    with open(GAZETTEER_PATH, encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            key = city_key(row['city'])
+            entries.setdefault(key, []).append(
+                (row['uf'].lower(), float(row['latitude']), float(row['longitude']))
+            )
+    return entries
+
+
+def locate_city(text):
+    """
+    Coordenadas (lat, lon) do centro da cidade, ou None se ela não estiver no gazetteer.
+    Com a UF informada, desempata cidades de mesmo nome em estados diferentes.
+    """
+    key, uf = split_city(text)
+    candidates = load_gazetteer().get(key)
+    if not candidates:
+        return None
+    for candidate_uf, latitude, longitude in candidates:
+        if uf is None or candidate_uf == uf:
+            return latitude, longitude
+    return None
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """Retângulo (lat_min, lat_max, lon_min, lon_max) que contém o círculo do raio informado."""
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    lon_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * max(math.cos(math.radians(latitude)), 0.01)))
+    return latitude - lat_delta, latitude + lat_delta, longitude - lon_delta, longitude + lon_delta
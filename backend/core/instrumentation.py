@@ -0,0 +1,199 @@
+# backend/core/instrumentation.py
+
+"""
+Métricas por requisição (opcional): número de consultas SQL, tempo no banco,
+tempo de renderização da resposta e latência total, agrupados pelo nome da rota.
+Ligue com REQUEST_METRICS=True (adiciona o RequestMetricsMiddleware ao MIDDLEWARE).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('core.metrics')
+
+# Métricas da requisição em andamento; o contextvar acompanha o sync_to_async das views assíncronas
+_current = ContextVar('request_metrics', default=None)
+
+LATENCY_SAMPLES = 1000
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Rota fez mais consultas que o limite em REQUEST_QUERY_BUDGETS (modo estrito)."""
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'db_ms', 'render_started', 'render_ms')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.render_started = None
+        self.render_ms = 0.0
+
+    def server_timing(self, total_ms):
+        app_ms = max(total_ms - self.db_ms - self.render_ms, 0.0)
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'render;dur={self.render_ms:.1f}',
+            f'app;dur={app_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _install_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class MetricsRegistry:
+    """Agregados por rota, em memória e por processo."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, name, total_ms, metrics):
+        with self.lock:
+            entry = self.endpoints.get(name)
+            if entry is None:
+                entry = self.endpoints[name] = {
+                    'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'render_ms': 0.0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'latencies': deque(maxlen=LATENCY_SAMPLES),
+                }
+            entry['requests'] += 1
+            entry['queries'] += metrics.queries
+            entry['max_queries'] = max(entry['max_queries'], metrics.queries)
+            entry['db_ms'] += metrics.db_ms
+            entry['render_ms'] += metrics.render_ms
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            entry['latencies'].append(total_ms)
+
+    def snapshot(self):
+        with self.lock:
+            result = {}
+            for name, entry in sorted(self.endpoints.items()):
+                requests = entry['requests']
+                latencies = sorted(entry['latencies'])
+                result[name] = {
+                    'requests': requests,
+                    'avg_queries': round(entry['queries'] / requests, 2),
+                    'max_queries': entry['max_queries'],
+                    'query_budget': query_budget(name),
+                    'avg_db_ms': round(entry['db_ms'] / requests, 2),
+                    'avg_render_ms': round(entry['render_ms'] / requests, 2),
+                    'avg_ms': round(entry['total_ms'] / requests, 2),
+                    'p50_ms': round(latencies[len(latencies) // 2], 2),
+                    'p95_ms': round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 2),
+                    'max_ms': round(entry['max_ms'], 2),
+                }
+            return result
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+
+def query_budget(name):
+    """Máximo de consultas permitido para a rota, ou None se não houver limite."""
+    return getattr(settings, 'REQUEST_QUERY_BUDGETS', {}).get(name)
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match and match.url_name:
+        return match.url_name
+    return 'unresolved'
+
+
+class RequestMetricsMiddleware:
+    """
+    Mede cada requisição e devolve o resultado no cabeçalho Server-Timing.
+    Se a rota passar do orçamento de consultas, registra um aviso; com
+    REQUEST_METRICS_STRICT=True levanta QueryBudgetExceeded (útil em testes).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Conexões novas (inclusive as das threads do sync_to_async) e as já abertas
+        connection_created.connect(_install_wrapper, dispatch_uid='core.instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def process_template_response(self, request, response):
+        # Respostas do DRF são renderizadas logo depois deste gancho
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_ms += (time.perf_counter() - metrics.render_started) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, metrics):
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+        name = endpoint_name(request)
+        registry.record(name, total_ms, metrics)
+        response['Server-Timing'] = metrics.server_timing(total_ms)
+
+        logger.info(
+            '%s %s %s queries=%d db=%.1fms render=%.1fms total=%.1fms',
+            name, request.method, response.status_code, metrics.queries, metrics.db_ms, metrics.render_ms, total_ms,
+        )
+
+        budget = query_budget(name)
+        if budget is not None and metrics.queries > budget:
+            message = f'{name}: {metrics.queries} consultas (orçamento: {budget})'
+            if getattr(settings, 'REQUEST_METRICS_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
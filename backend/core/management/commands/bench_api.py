@@ -0,0 +1,311 @@
+# backend/core/management/commands/bench_api.py
+
+import json
+import random
+import subprocess
+import time
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core.catalog_cache import discard_cached_pages
+from core.geo import city_key, locate_city
+from core.models import Order, OrderItem, ProducerProfile, Product, Rating, normalize_phone
+from core.search import build_document
+
+CITIES = ['São Paulo', 'Campinas', 'Santos', 'Sorocaba', 'Jundiaí', 'Ribeirão Preto']
+CATEGORIES = ['Frutas', 'Verduras', 'Legumes', 'Ovos', 'Laticínios', 'Grãos']
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark da API: popula dados sintéticos na escala pedida e chama as rotas reais '
+        '(config.urls) — diretório, produtos do produtor, criação de pedido, mudança de status '
+        'e avaliação. Gera um relatório JSON com req/s, p50/p95/p99 e consultas por rota; '
+        'com --compare aponta regressões em relação a um relatório anterior. '
+        'Os dados sintéticos são removidos ao final (exceto com --keep).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--producers', type=int, default=50, help='Produtores sintéticos.')
+        parser.add_argument('--products', type=int, default=20, help='Produtos por produtor.')
+        parser.add_argument('--orders', type=int, default=2000, help='Pedidos históricos (distribuídos entre os produtores).')
+        parser.add_argument('--ratings', type=int, default=500, help='Avaliações históricas (sobre pedidos entregues).')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por rota.')
+        parser.add_argument('--no-cache', action='store_true', help='Descarta as páginas do catálogo em cache antes de cada leitura.')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados e da escolha de produtores.')
+        parser.add_argument('--output', default='bench_api.json', help='Arquivo JSON do relatório.')
+        parser.add_argument('--compare', help='Relatório anterior para comparação.')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Piora tolerada no p95 (0.2 = 20%%).')
+        parser.add_argument('--keep', action='store_true', help='Não remove os dados sintéticos.')
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        self.random = random.Random(options['seed'])
+        self.use_cache = not options['no_cache']
+        self.tag = uuid.uuid4().hex[:8]
+        self.profile_ids = []
+
+        started = time.perf_counter()
+        try:
+            users = self.seed(options)
+            self.stdout.write(f'Dados sintéticos criados em {time.perf_counter() - started:.1f}s.')
+            endpoints = self.run_scenarios(users, options['requests'])
+        finally:
+            if not options['keep']:
+                # Pedidos, produtos e avaliações saem junto (CASCADE)
+                User.objects.filter(username__startswith=f'bench-{self.tag}-').delete()
+                # Só as páginas do catálogo: o cache é compartilhado com o site (sessões, throttles)
+                discard_cached_pages(self.profile_ids)
+
+        report = {
+            'meta': {
+                'commit': self.git_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'cache': self.use_cache,
+                'scale': {key: options[key] for key in ('producers', 'products', 'orders', 'ratings', 'requests')},
+            },
+            'endpoints': endpoints,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2, ensure_ascii=False)
+
+        self.print_report(endpoints)
+        self.stdout.write(f'Relatório salvo em {options["output"]}.')
+
+        if options['compare']:
+            self.compare(options['compare'], endpoints, options['threshold'])
+
+    # Dados sintéticos
+
+    def seed(self, options):
+        rng = self.random
+        users = User.objects.bulk_create([
+            User(username=f'bench-{self.tag}-{i}', email=f'bench-{self.tag}-{i}@example.com')
+            for i in range(options['producers'])
+        ])
+        if not users[0].pk:
+            users = list(User.objects.filter(username__startswith=f'bench-{self.tag}-').order_by('pk'))
+
+        # bulk_create não dispara os sinais: documento de busca e localização são preenchidos aqui
+        profiles = []
+        for i, user in enumerate(users):
+            city = CITIES[i % len(CITIES)]
+            location = locate_city(city) or (None, None)
+            name = f'Sítio Benchmark {i}'
+            profiles.append(ProducerProfile(
+                user=user, name=name, cpf_cnpj=f'B{self.tag}{i}', city=city, address='Estrada 1',
+                phone='11999999999',
+                search_document=build_document(name, city), city_key=city_key(city),
+                latitude=location[0], longitude=location[1],
+            ))
+        ProducerProfile.objects.bulk_create(profiles)
+
+        products = []
+        for user in users:
+            for j in range(options['products']):
+                category = rng.choice(CATEGORIES)
+                name = f'Produto {j} {category}'
+                products.append(Product(
+                    owner=user, name=name, category=category, stock=1_000_000,
+                    price=Decimal(rng.randint(100, 5000)) / 100, search_document=build_document(name, category),
+                ))
+        Product.objects.bulk_create(products, batch_size=1000)
+        products_by_owner = {}
+        for product in Product.objects.filter(owner__in=users).only('pk', 'owner_id', 'name', 'price'):
+            products_by_owner.setdefault(product.owner_id, []).append(product)
+
+        orders = []
+        order_items = []
+        for i in range(options['orders']):
+            user = users[i % len(users)]
+            chosen = rng.sample(products_by_owner[user.pk], min(3, len(products_by_owner[user.pk])))
+            quantities = [rng.randint(1, 5) for _ in chosen]
+            total = sum(product.price * quantity for product, quantity in zip(chosen, quantities))
+            orders.append(Order(
+                producer=user, client_name=f'Cliente {i}', client_phone=f'1190000{i % 10000:04d}',
+                client_phone_key=normalize_phone(f'1190000{i % 10000:04d}'),
+                status=rng.choice(['Pendente', 'Aceito', 'Entregue', 'Entregue', 'Cancelado']), total_price=total,
+            ))
+            order_items.append(list(zip(chosen, quantities)))
+        Order.objects.bulk_create(orders, batch_size=1000)
+        if orders and not orders[0].pk:
+            orders = list(Order.objects.filter(producer__in=users).order_by('pk'))
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, product=product, product_name=product.name, quantity=quantity,
+                unit_price=product.price, subtotal=product.price * quantity,
+            )
+            for order, items in zip(orders, order_items) for product, quantity in items
+        ], batch_size=1000)
+
+        delivered = [order for order in orders if order.status == 'Entregue']
+        Rating.objects.bulk_create([
+            Rating(
+                producer_id=order.producer_id, order=order, client_name=order.client_name,
+                client_phone=order.client_phone, score=rng.randint(1, 5),
+            )
+            for order in delivered[:options['ratings']]
+        ], batch_size=1000)
+        for profile in ProducerProfile.objects.filter(user__in=users):
+            profile.refresh_rating_aggregates()
+
+        return users
+
+    # Cenários
+
+    def run_scenarios(self, users, total):
+        rng = self.random
+        anonymous = Client()
+        profiles = dict(ProducerProfile.objects.filter(user__in=users).values_list('user_id', 'pk'))
+        self.profile_ids = list(profiles.values())
+        products_by_owner = {}
+        for pk, owner_id in Product.objects.filter(owner__in=users).values_list('pk', 'owner_id'):
+            products_by_owner.setdefault(owner_id, []).append(pk)
+        producer_clients = {}
+
+        def producer_client(user):
+            if user.pk not in producer_clients:
+                producer_clients[user.pk] = Client()
+                producer_clients[user.pk].force_login(user)
+            return producer_clients[user.pk]
+
+        results = {}
+        results['directory'] = self.measure(
+            total, 200, lambda i: anonymous.get('/api/producers/'), read=True,
+        )
+        results['producer_products'] = self.measure(
+            total, 200, lambda i: anonymous.get(f'/api/producers/{profiles[rng.choice(users).pk]}/products/'), read=True,
+        )
+
+        created = []
+
+        def create_order(i):
+            user = rng.choice(users)
+            items = rng.sample(products_by_owner[user.pk], min(2, len(products_by_owner[user.pk])))
+            response = anonymous.post('/api/orders/', {
+                'producer': user.pk, 'client_name': f'Cliente bench {i}', 'client_phone': f'1198888{i % 10000:04d}',
+                'items': [{'product': pk, 'quantity': 1} for pk in items],
+            }, content_type='application/json')
+            if response.status_code == 201:
+                created.append((user, response.json()['id'], f'1198888{i % 10000:04d}'))
+            return response
+
+        results['order_create'] = self.measure(total, 201, create_order)
+
+        def update_status(i):
+            user, order_id, _ = created[i % len(created)]
+            return producer_client(user).patch(
+                f'/api/orders/{order_id}/update_status/', {'status': 'Entregue'}, content_type='application/json',
+            )
+
+        results['order_status_update'] = self.measure(len(created), 200, update_status)
+
+        def create_rating(i):
+            _, order_id, phone = created[i % len(created)]
+            return anonymous.post('/api/ratings/', {
+                'order_id': order_id, 'client_name': 'Cliente bench', 'client_phone': phone,
+                'score': rng.randint(1, 5), 'comment': 'Benchmark',
+            }, content_type='application/json')
+
+        results['rating_create'] = self.measure(len(created), 201, create_rating)
+        return results
+
+    def measure(self, total, expected_status, call, read=False):
+        latencies = []
+        queries = []
+        errors = 0
+        started = time.perf_counter()
+        for i in range(total):
+            if read and not self.use_cache:
+                discard_cached_pages(self.profile_ids)
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = call(i)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(len(captured.captured_queries))
+            if response.status_code != expected_status:
+                errors += 1
+        elapsed = time.perf_counter() - started
+
+        if not latencies:
+            return {'requests': 0, 'errors': 0}
+        return {
+            'requests': total,
+            'errors': errors,
+            'rps': round(total / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'avg_queries': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+        }
+
+    # Relatório
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def print_report(self, endpoints):
+        self.stdout.write(
+            f'{"rota":<22}{"req":>6}{"erros":>7}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"consultas":>11}'
+        )
+        for name, result in endpoints.items():
+            if not result['requests']:
+                self.stdout.write(f'{name:<22}{0:>6}')
+                continue
+            self.stdout.write(
+                f'{name:<22}{result["requests"]:>6}{result["errors"]:>7}{result["rps"]:>9.1f}'
+                f'{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+                f'{result["avg_queries"]:>6.1f}/{result["max_queries"]:<4}'
+            )
+
+    def compare(self, path, endpoints, threshold):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                baseline = json.load(handle)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Não foi possível ler {path}: {error}')
+
+        self.stdout.write(f'\nComparação com {path} (commit {baseline["meta"].get("commit")}):')
+        regressions = []
+        for name, current in endpoints.items():
+            previous = baseline['endpoints'].get(name)
+            if not previous or not previous.get('requests') or not current['requests']:
+                continue
+            change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0
+            self.stdout.write(
+                f'{name:<22}p95 {previous["p95_ms"]:.2f} -> {current["p95_ms"]:.2f} ms ({change:+.0%}); '
+                f'consultas {previous["max_queries"]} -> {current["max_queries"]}'
+            )
+            # Variações abaixo de 1 ms são ruído de medição
+            if change > threshold and current['p95_ms'] - previous['p95_ms'] > 1:
+                regressions.append(f'{name}: p95 {change:+.0%}')
+            if current['max_queries'] > previous['max_queries']:
+                regressions.append(f'{name}: {previous["max_queries"]} -> {current["max_queries"]} consultas')
+            if current['errors'] > previous['errors']:
+                regressions.append(f'{name}: {current["errors"]} erros')
+
+        if regressions:
+            raise CommandError('Regressões encontradas:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Nenhuma regressão acima do limite.'))
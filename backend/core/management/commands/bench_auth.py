@@ -0,0 +1,69 @@
+# backend/core/management/commands/bench_auth.py
+
+import time
+import uuid
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from core.authentication import ClaimsJWTAuthentication, ClaimsTokenObtainPairSerializer, CachedTokenAuthentication
+
+SETUPS = {
+    'antes': (TokenAuthentication, JWTAuthentication, SessionAuthentication),
+    'depois': (ClaimsJWTAuthentication, CachedTokenAuthentication, SessionAuthentication),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo da autenticação por requisição (tempo e consultas) com a ordem '
+        'antiga das classes (Token, JWT, sessão) e com a nova (JWT por claims e Token '
+        'com cache), para JWT e Token do DRF, em leituras (GET) e escritas (POST).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Autenticações por combinação.')
+
+    def handle(self, *args, **options):
+        suffix = uuid.uuid4().hex[:12]
+        user = User.objects.create_user(username=f'bench-auth-{suffix}', email=f'bench-auth-{suffix}@example.com')
+        try:
+            jwt = str(ClaimsTokenObtainPairSerializer.get_token(user).access_token)
+            credentials = {
+                'Bearer <jwt>': f'Bearer {jwt}',
+                'Token <jwt>': f'Token {jwt}',  # formato enviado pelo frontend
+                'Bearer <jwt antigo>': f'Bearer {AccessToken.for_user(user)}',
+                'Token <chave>': f'Token {Token.objects.create(user=user).key}',
+            }
+            self.stdout.write(f'{"credencial":<22}{"método":<8}{"classes":<9}{"µs/req":>10}{"consultas":>11}')
+            for label, header in credentials.items():
+                for method in ('get', 'post'):
+                    for setup, classes in SETUPS.items():
+                        result = self.measure(method, header, classes, options['requests'])
+                        self.stdout.write(f'{label:<22}{method.upper():<8}{setup:<9}{result}')
+        finally:
+            user.delete()
+
+    def measure(self, method, header, classes, total):
+        factory = RequestFactory()
+        authenticators = [auth() for auth in classes]
+        queries = 0
+        elapsed = 0.0
+        for _ in range(total):
+            request = Request(getattr(factory, method)('/api/orders/', HTTP_AUTHORIZATION=header), authenticators=authenticators)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                try:
+                    request.user
+                except AuthenticationFailed:
+                    return f'{"falha":>10}{"-":>11}'
+                elapsed += time.perf_counter() - started
+            queries += len(captured.captured_queries)
+        return f'{elapsed / total * 1_000_000:>10.1f}{queries / total:>11.2f}'
@@ -0,0 +1,64 @@
+# backend/core/management/commands/bench_bulk_upsert.py
+
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from core.models import ProducerProfile, Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o endpoint de importação em lote (/api/products/bulk_upsert/): cria N produtos '
+        'em um produtor temporário e depois atualiza os mesmos N, informando linhas/s. '
+        'O produtor e os produtos são removidos ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Quantidade de produtos no lote.')
+        parser.add_argument('--csv', action='store_true', help='Envia o lote como CSV em vez de JSON.')
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        rows = options['rows']
+        suffix = time.time_ns()
+        user = User.objects.create_user(username=f'bench-bulk-{suffix}', password=None)
+        ProducerProfile.objects.create(user=user, name='Produtor benchmark', cpf_cnpj=str(suffix)[-14:])
+        client = Client()
+        client.force_login(user)
+
+        try:
+            created = [
+                {'name': f'Produto {i}', 'category': 'Verduras', 'price': '5.00', 'stock': 10}
+                for i in range(rows)
+            ]
+            self.run_pass(client, 'criação', created, options['csv'])
+
+            ids = Product.objects.filter(owner=user).order_by('pk').values_list('pk', flat=True)
+            updated = [{'id': pk, 'price': '6.50', 'stock': 20} for pk in ids]
+            self.run_pass(client, 'atualização', updated, options['csv'])
+        finally:
+            Product.objects.filter(owner=user).delete()
+            user.delete()
+
+    def run_pass(self, client, label, rows, as_csv):
+        if as_csv:
+            columns = list(rows[0])
+            body = '\n'.join([','.join(columns)] + [','.join(str(row[c]) for c in columns) for row in rows])
+            kwargs = {'data': body, 'content_type': 'text/csv'}
+        else:
+            kwargs = {'data': rows, 'content_type': 'application/json'}
+
+        started = time.perf_counter()
+        response = client.post('/api/products/bulk_upsert/', **kwargs)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f'{label}: resposta {response.status_code}: {response.content[:500]!r}')
+        result = response.json()
+        self.stdout.write(
+            f'{label:<12} {len(rows)} linhas em {elapsed:.2f}s '
+            f'({len(rows) / elapsed:.0f} linhas/s; criados={result["created"]}, atualizados={result["updated"]})'
+        )
@@ -0,0 +1,102 @@
+# backend/core/management/commands/bench_catalog_asgi.py
+
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from core.catalog_cache import discard_cached_pages
+from core.models import ProducerProfile
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def summarize(latencies, elapsed):
+    return {
+        'rps': len(latencies) / elapsed if elapsed else 0,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara requisições/s e latência p99 das leituras do catálogo pelo caminho '
+        'WSGI (views DRF síncronas, N threads) e ASGI (views assíncronas, N tarefas) '
+        'com a mesma concorrência. Usa os dados já existentes no banco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requisições por endpoint e caminho.')
+        parser.add_argument('--workers', type=int, default=8, help='Concorrência (threads WSGI / tarefas ASGI).')
+        parser.add_argument('--with-cache', action='store_true', help='Mantém o cache do catálogo ligado (padrão: páginas descartadas a cada requisição).')
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        producer_id = ProducerProfile.objects.values_list('pk', flat=True).first()
+        if producer_id is None:
+            raise CommandError('Nenhum produtor no banco; popule dados antes de rodar o benchmark.')
+
+        endpoints = [
+            ('diretório', '/api/producers/', '/api/async/producers/'),
+            ('produtor', f'/api/producers/{producer_id}/', f'/api/async/producers/{producer_id}/'),
+            ('produtos', f'/api/producers/{producer_id}/products/', f'/api/async/producers/{producer_id}/products/'),
+        ]
+        self.use_cache = options['with_cache']
+        self.producer_id = producer_id
+
+        self.stdout.write(f'{"endpoint":<12}{"caminho":<8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for label, sync_url, async_url in endpoints:
+            for path, result in (
+                ('wsgi', self.run_wsgi(sync_url, options['requests'], options['workers'])),
+                ('asgi', asyncio.run(self.run_asgi(async_url, options['requests'], options['workers']))),
+            ):
+                self.stdout.write(
+                    f'{label:<12}{path:<8}{result["rps"]:>10.1f}{result["p50_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                )
+
+    def run_wsgi(self, url, total, workers):
+        def call(_):
+            close_old_connections()
+            if not self.use_cache:
+                discard_cached_pages([self.producer_id])
+            client = Client()
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{url} respondeu {response.status_code}')
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = list(pool.map(call, range(total)))
+        return summarize(latencies, time.perf_counter() - started)
+
+    async def run_asgi(self, url, total, workers):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(workers)
+
+        async def call():
+            async with semaphore:
+                if not self.use_cache:
+                    await sync_to_async(discard_cached_pages)([self.producer_id])
+                started = time.perf_counter()
+                response = await client.get(url)
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f'{url} respondeu {response.status_code}')
+                return elapsed
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(call() for _ in range(total)))
+        return summarize(latencies, time.perf_counter() - started)
@@ -0,0 +1,72 @@
+# backend/core/management/commands/check_query_budgets.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from core.catalog_cache import discard_cached_pages
+from core.instrumentation import QueryBudgetExceeded
+from core.models import ProducerProfile
+
+MIDDLEWARE_PATH = 'core.instrumentation.RequestMetricsMiddleware'
+
+
+def budget_calls(profile):
+    """Rotas verificadas: (precisa estar logado como o produtor, url)."""
+    city = profile.city or 'São Paulo'
+    return [
+        (False, '/api/producers/'),
+        (False, f'/api/producers/nearby/?city={city}'),
+        (False, f'/api/producers/{profile.pk}/'),
+        (False, f'/api/producers/{profile.pk}/products/'),
+        (False, f'/api/producers/{profile.pk}/ratings/summary/'),
+        (False, '/api/search/?q=org'),
+        (False, '/api/async/producers/'),
+        (False, f'/api/async/producers/{profile.pk}/'),
+        (False, f'/api/async/producers/{profile.pk}/products/'),
+        (True, '/api/products/'),
+        (True, '/api/orders/'),
+        (True, '/api/ratings/'),
+        (True, '/api/analytics/sales/'),
+        (True, '/api/my-profile/'),
+    ]
+
+
+def strict_middleware():
+    """MIDDLEWARE com o RequestMetricsMiddleware, para usar com REQUEST_METRICS_STRICT."""
+    return settings.MIDDLEWARE if MIDDLEWARE_PATH in settings.MIDDLEWARE else [MIDDLEWARE_PATH, *settings.MIDDLEWARE]
+
+
+class Command(BaseCommand):
+    help = (
+        'Chama as rotas de leitura com o RequestMetricsMiddleware em modo estrito e '
+        'confere o número de consultas contra REQUEST_QUERY_BUDGETS. Usa o primeiro '
+        'produtor do banco; as páginas do catálogo em cache são descartadas antes de cada '
+        'chamada (o restante do cache não é tocado).'
+    )
+
+    def handle(self, *args, **options):
+        profile = ProducerProfile.objects.directory().first()
+        if profile is None:
+            raise CommandError('Nenhum produtor no banco; popule dados antes de rodar a verificação.')
+
+        anonymous = Client()
+        producer = Client()
+        producer.force_login(profile.user)
+        calls = [(producer if authenticated else anonymous, url) for authenticated, url in budget_calls(profile)]
+
+        middleware = strict_middleware()
+        failures = 0
+        with override_settings(MIDDLEWARE=middleware, REQUEST_METRICS_STRICT=True, ALLOWED_HOSTS=['testserver']):
+            for client, url in calls:
+                discard_cached_pages([profile.pk])
+                try:
+                    response = client.get(url)
+                except QueryBudgetExceeded as error:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'FALHOU {url}: {error}'))
+                    continue
+                self.stdout.write(f'ok     {url}: {response["Server-Timing"]}')
+
+        if failures:
+            raise CommandError(f'{failures} rota(s) acima do orçamento de consultas.')
+        self.stdout.write(self.style.SUCCESS('Todas as rotas dentro do orçamento.'))
@@ -0,0 +1,58 @@
+# backend/core/management/commands/check_query_plans.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from core.models import Product, Order, Rating
+
+
+def hot_queries():
+    """
+    Consultas mais frequentes da API, cada uma com o índice composto que
+    deve atendê-la e se a ordenação precisa vir pronta do índice.
+    """
+    ordering = ('-created_at', '-id')
+    return [
+        ('produtos do produtor', 'product_owner_created_idx', True,
+         Product.objects.filter(owner_id=1).order_by(*ordering)[:20]),
+        ('categorias do produtor', 'product_owner_category_idx', False,
+         Product.objects.filter(owner_id=1).values_list('category', flat=True).distinct()),
+        ('pedidos do produtor', 'order_producer_created_idx', True,
+         Order.objects.filter(producer_id=1).order_by(*ordering)[:20]),
+        ('pedidos por telefone', 'order_phone_key_created_idx', True,
+         Order.objects.filter(client_phone_key='+5511999999999').order_by(*ordering)[:20]),
+        ('avaliações do produtor', 'rating_producer_created_idx', True,
+         Rating.objects.filter(producer_id=1).order_by(*ordering)[:20]),
+    ]
+
+
+def plan_sorts(plan):
+    """Indica se o plano ainda faz uma ordenação separada após o filtro."""
+    if connection.vendor == 'sqlite':
+        return 'USE TEMP B-TREE FOR ORDER BY' in plan
+    return any(line.strip().startswith(('Sort', '->  Sort')) for line in plan.splitlines())
+
+
+class Command(BaseCommand):
+    help = 'Mostra o EXPLAIN das consultas principais e verifica se usam os índices compostos.'
+
+    def handle(self, *args, **options):
+        failures = []
+
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Em tabelas pequenas o Postgres prefere seq scan; força a avaliação dos índices
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, index_name, needs_order, queryset in hot_queries():
+                plan = queryset.explain()
+                self.stdout.write(f'--- {label} ---\n{plan}\n')
+
+                if index_name not in plan:
+                    failures.append(f'{label}: índice {index_name} não utilizado')
+                elif needs_order and plan_sorts(plan):
+                    failures.append(f'{label}: ordenação feita fora do índice')
+
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Todas as consultas usam os índices esperados.'))
@@ -0,0 +1,26 @@
+# backend/core/management/commands/geocode_producers.py
+
+from django.core.management.base import BaseCommand
+from core.geo import city_key, locate_city
+from core.models import ProducerProfile
+
+
+class Command(BaseCommand):
+    help = 'Recalcula city_key, latitude e longitude dos produtores a partir do gazetteer local (sem acesso à rede).'
+
+    def handle(self, *args, **options):
+        located = missing = 0
+        for profile in ProducerProfile.objects.all().iterator():
+            profile.city_key = city_key(profile.city)
+            location = locate_city(profile.city)
+            # Sem localização, as coordenadas antigas são apagadas
+            profile.latitude, profile.longitude = location or (None, None)
+            if location:
+                located += 1
+            elif profile.city:
+                missing += 1
+                self.stdout.write(self.style.WARNING(f'Cidade fora do gazetteer: "{profile.city}" ({profile.name})'))
+            # save() também invalida o cache do catálogo deste produtor
+            profile.save(update_fields=['city_key', 'latitude', 'longitude'])
+
+        self.stdout.write(self.style.SUCCESS(f'{located} produtor(es) localizado(s), {missing} cidade(s) não encontrada(s).'))
@@ -0,0 +1,75 @@
+# backend/core/management/commands/loadtest_checkout.py
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import Client
+from core.models import ProducerProfile, Product, OrderItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Dispara vários checkouts em paralelo contra um único produto e verifica '
+        'que o estoque nunca fica negativo nem é vendido além do disponível. '
+        'Cria um produtor temporário e o remove ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=50, help='Estoque inicial do produto.')
+        parser.add_argument('--orders', type=int, default=200, help='Quantidade de checkouts disparados.')
+        parser.add_argument('--workers', type=int, default=16, help='Checkouts simultâneos.')
+        parser.add_argument('--quantity', type=int, default=1, help='Quantidade por pedido.')
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS and '*' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        suffix = uuid.uuid4().hex[:12]
+        user = User.objects.create_user(username=f'loadtest-{suffix}', email=f'loadtest-{suffix}@example.com')
+        try:
+            ProducerProfile.objects.create(user=user, name='Load test', cpf_cnpj=f'LT{suffix}')
+            product = Product.objects.create(
+                owner=user, name='Produto de teste', category='Teste', price=1, stock=options['stock']
+            )
+            self._run(user, product, options)
+        finally:
+            user.delete()
+
+    def _run(self, user, product, options):
+        payload = {
+            'producer': user.id,
+            'client_name': 'Cliente de teste',
+            'client_phone': '11999999999',
+            'items': [{'product': product.id, 'quantity': options['quantity']}],
+        }
+
+        def checkout(_):
+            close_old_connections()
+            try:
+                response = Client().post('/api/orders/', payload, content_type='application/json')
+                return response.status_code
+            except Exception as exc:  # Ex.: "database is locked" no SQLite
+                return type(exc).__name__
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            results = list(pool.map(checkout, range(options['orders'])))
+
+        product.refresh_from_db()
+        sold = sum(OrderItem.objects.filter(product=product).values_list('quantity', flat=True))
+        created = results.count(201)
+        rejected = results.count(400)
+        errors = len(results) - created - rejected
+
+        self.stdout.write(
+            f'pedidos criados: {created}  recusados por estoque: {rejected}  erros: {errors}\n'
+            f'estoque inicial: {options["stock"]}  vendido: {sold}  estoque final: {product.stock}'
+        )
+
+        if product.stock < 0 or sold > options['stock'] or product.stock + sold != options['stock']:
+            raise CommandError('Inconsistência de estoque detectada.')
+        self.stdout.write(self.style.SUCCESS('Estoque consistente.'))
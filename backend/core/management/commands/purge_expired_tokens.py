@@ -0,0 +1,32 @@
+# backend/core/management/commands/purge_expired_tokens.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove refresh tokens expirados das tabelas outstanding/blacklisted do simplejwt, '
+        'em lotes para não travar as tabelas. Um token expirado já é recusado pela '
+        'validação de exp, então a linha na blacklist não é mais necessária. '
+        'Agende (ex.: cron diário) para manter as tabelas com tamanho limitado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=5000, help='Tokens apagados por comando DELETE.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('id')
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:options['batch']])
+            if not ids:
+                break
+            # BlacklistedToken sai junto (CASCADE)
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+
+        remaining = OutstandingToken.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'{total} tokens expirados removidos; {remaining} ainda válidos.'))
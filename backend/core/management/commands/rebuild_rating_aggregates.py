@@ -0,0 +1,26 @@
+# backend/core/management/commands/rebuild_rating_aggregates.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import ProducerProfile
+
+
+class Command(BaseCommand):
+    help = 'Recalcula rating_count, rating_sum, rating_average e rating_histogram de todos os produtores a partir da tabela Rating.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--producer', type=int, help='ID do perfil de produtor a recalcular (padrão: todos).')
+
+    def handle(self, *args, **options):
+        profiles = ProducerProfile.objects.all()
+        if options['producer']:
+            profiles = profiles.filter(pk=options['producer'])
+
+        total = 0
+        for profile_id in profiles.values_list('pk', flat=True).iterator():
+            with transaction.atomic():
+                profile = ProducerProfile.objects.select_for_update().get(pk=profile_id)
+                profile.refresh_rating_aggregates()
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{total} perfil(is) de produtor recalculado(s).'))
@@ -0,0 +1,19 @@
+# backend/core/management/commands/rebuild_sales_rollups.py
+
+from django.core.management.base import BaseCommand
+from core.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula os resumos diários de vendas (ProducerSalesDaily/ProductSalesDaily) '
+        'a partir dos pedidos entregues e cancelados. Use para o backfill inicial ou '
+        'para corrigir divergências.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--producer', type=int, help='Recalcula apenas o produtor (id do usuário).')
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups(producer_id=options.get('producer'))
+        self.stdout.write(self.style.SUCCESS(f'{rows} linhas de resumo gravadas.'))
@@ -0,0 +1,42 @@
+# backend/core/management/commands/run_outbox_worker.py
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.outbox import process_batch, purge_processed
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker do outbox: lê os eventos pendentes no banco (ex.: novos pedidos) e os '
+        'entrega aos produtores como notificações. Rode em um processo separado do servidor web.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100, help='Eventos por rodada (cada um na própria transação).')
+        parser.add_argument('--interval', type=float, default=1.0, help='Espera (s) quando a fila está vazia.')
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila uma vez e sai.')
+        parser.add_argument('--purge-days', type=int, default=7, help='Apaga eventos entregues há mais de N dias (0 desliga).')
+
+    def handle(self, *args, **options):
+        last_purge = 0.0
+        try:
+            while True:
+                close_old_connections()
+                if options['purge_days'] and time.monotonic() - last_purge > 3600:
+                    purged = purge_processed(options['purge_days'])
+                    if purged:
+                        self.stdout.write(f'{purged} eventos antigos removidos.')
+                    last_purge = time.monotonic()
+
+                handled = process_batch(options['batch'])
+                if handled:
+                    self.stdout.write(f'{handled} eventos processados.')
+                # Lote cheio: provavelmente há mais pendentes, continua sem esperar
+                if handled == options['batch']:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Worker encerrado.')
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:42
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    ProducerProfile = apps.get_model('core', 'ProducerProfile')
+    Rating = apps.get_model('core', 'Rating')
+    totals = Rating.objects.values('producer_id').annotate(count=Count('id'), total=Sum('score'))
+    for row in totals:
+        ProducerProfile.objects.filter(user_id=row['producer_id']).update(
+            rating_count=row['count'],
+            rating_sum=row['total'] or 0,
+            rating_average=(row['total'] or 0) / row['count'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='rating_average',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='producerprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='producerprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
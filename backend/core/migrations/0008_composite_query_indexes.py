@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_producerprofile_rating_aggregates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['producer', '-created_at', '-id'], name='order_producer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client_phone', '-created_at', '-id'], name='order_phone_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='product_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['owner', 'category'], name='product_owner_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['producer', '-created_at', '-id'], name='rating_producer_created_idx'),
+        ),
+    ]
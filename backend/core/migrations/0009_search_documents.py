@@ -0,0 +1,106 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:49
+
+import re
+import unicodedata
+from django.db import migrations, models
+
+# Cópia da normalização de core.search no momento desta migração: mudanças
+# futuras em core.search não alteram o que a migração grava.
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'uns', 'umas', 'com', 'sem', 'para', 'pra', 'por', 'ao', 'aos', 'ou',
+}
+
+PLURAL_SUFFIXES = (
+    ('oes', 'ao'),
+    ('aes', 'ao'),
+    ('ais', 'al'),
+    ('eis', 'el'),
+    ('res', 'r'),
+    ('zes', 'z'),
+    ('ns', 'm'),
+    ('s', ''),
+)
+
+
+def strip_accents(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token):
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text):
+    words = re.findall(r'[a-z0-9]+', strip_accents(text or '').lower())
+    return [stem(word) for word in words if word not in STOPWORDS and len(word) > 1]
+
+
+def build_document(*parts):
+    tokens = []
+    for part in parts:
+        for token in tokenize(part):
+            if token not in tokens:
+                tokens.append(token)
+    return ' '.join(tokens)
+
+
+def backfill_search_documents(apps, schema_editor):
+    ProducerProfile = apps.get_model('core', 'ProducerProfile')
+    Product = apps.get_model('core', 'Product')
+    for profile in ProducerProfile.objects.all().iterator():
+        profile.search_document = build_document(profile.name, profile.city)
+        profile.save(update_fields=['search_document'])
+    for product in Product.objects.all().iterator():
+        product.search_document = build_document(product.name, product.category)
+        product.save(update_fields=['search_document'])
+
+
+# Índices GIN para a busca textual; só existem no Postgres (no SQLite a busca usa índice em memória)
+GIN_INDEXES = {
+    'core_product_search_gin': 'core_product',
+    'core_producerprofile_search_gin': 'core_producerprofile',
+}
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table in GIN_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING gin (to_tsvector('simple'::regconfig, COALESCE(search_document, '')))"
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_composite_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:51
+
+import csv
+import re
+import unicodedata
+from pathlib import Path
+from django.conf import settings
+from django.db import migrations, models
+
+# Cópia da normalização de core.geo no momento desta migração: mudanças futuras
+# em core.geo não alteram o que a migração grava. O gazetteer é lido do arquivo de dados.
+GAZETTEER_PATH = Path(__file__).resolve().parent.parent / 'data' / 'gazetteer.csv'
+
+UF_SUFFIX = re.compile(r'\s*[-/,]\s*([a-z]{2})\s*$')
+
+
+def split_city(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    value = ''.join(char for char in decomposed if not unicodedata.combining(char)).lower().strip()
+    uf = None
+    match = UF_SUFFIX.search(value)
+    if match:
+        uf = match.group(1)
+        value = value[:match.start()]
+    value = re.sub(r'[^a-z0-9]+', ' ', value).strip()
+    return value, uf
+
+
+def city_key(text):
+    return split_city(text)[0]
+
+
+def load_gazetteer():
+    entries = {}
+    with open(GAZETTEER_PATH, encoding='utf-8') as handle:
+        for row in csv.DictReader(handle):
+            entries.setdefault(city_key(row['city']), []).append(
+                (row['uf'].lower(), float(row['latitude']), float(row['longitude']))
+            )
+    return entries
+
+
+def locate_city(text, gazetteer):
+    key, uf = split_city(text)
+    for candidate_uf, latitude, longitude in gazetteer.get(key, ()):
+        if uf is None or candidate_uf == uf:
+            return latitude, longitude
+    return None
+
+
+def backfill_locations(apps, schema_editor):
+    ProducerProfile = apps.get_model('core', 'ProducerProfile')
+    gazetteer = load_gazetteer()
+    for profile in ProducerProfile.objects.exclude(city__isnull=True).exclude(city='').iterator():
+        profile.city_key = city_key(profile.city)
+        profile.latitude, profile.longitude = locate_city(profile.city, gazetteer) or (None, None)
+        profile.save(update_fields=['city_key', 'latitude', 'longitude'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_search_documents'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='city_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='producerprofile',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='producerprofile',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='producerprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='producer_lat_lon_idx'),
+        ),
+        migrations.RunPython(backfill_locations, migrations.RunPython.noop),
+    ]
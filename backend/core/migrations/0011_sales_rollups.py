@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_producer_location'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProducerSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_value', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('producer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_daily', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('producer', 'day'), name='producer_sales_daily_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=255)),
+                ('day', models.DateField()),
+                ('delivered_orders', models.PositiveIntegerField(default=0)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_quantity', models.PositiveIntegerField(default=0)),
+                ('producer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_sales_daily', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_daily', to='core.product')),
+            ],
+            options={
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['producer', 'day'], name='product_sales_producer_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'day'), name='product_sales_daily_unique')],
+            },
+        ),
+    ]
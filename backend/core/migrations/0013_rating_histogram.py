@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:14
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_histogram(apps, schema_editor):
+    ProducerProfile = apps.get_model('core', 'ProducerProfile')
+    Rating = apps.get_model('core', 'Rating')
+    histograms = {}
+    rows = Rating.objects.filter(score__range=(1, 5)).values_list('producer_id', 'score').annotate(count=Count('id')).order_by()
+    for producer_id, score, count in rows:
+        histograms.setdefault(producer_id, [0] * 5)[score - 1] = count
+    for producer_id, histogram in histograms.items():
+        ProducerProfile.objects.filter(user_id=producer_id).update(rating_histogram=histogram)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_outbox_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producerprofile',
+            name='rating_histogram',
+            field=models.JSONField(default=core.models.empty_rating_histogram),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(condition=models.Q(('comment__gt', '')), fields=['producer', '-created_at', '-id'], name='rating_commented_idx'),
+        ),
+        migrations.RunPython(backfill_rating_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_phone(value):
+    """Cópia de core.models.normalize_phone no momento desta migração (E.164, +55 por padrão)."""
+    value = (value or '').strip()
+    digits = ''.join(ch for ch in value if ch.isdigit())
+    if not digits:
+        return ''
+    if value.startswith('+'):
+        return '+' + digits
+    digits = digits.lstrip('0')
+    if len(digits) in (12, 13) and digits.startswith('55'):
+        return '+' + digits
+    return '+55' + digits
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_client_phone_key(apps, schema_editor):
+    # Preenche antes de criar os índices; em lotes para não carregar a tabela inteira
+    for model_name in ('Order', 'Rating'):
+        model = apps.get_model('core', model_name)
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_id).order_by('pk').only('pk', 'client_phone')[:BATCH_SIZE])
+            if not rows:
+                break
+            for row in rows:
+                row.client_phone_key = normalize_phone(row.client_phone)
+            model.objects.bulk_update(rows, ['client_phone_key'])
+            last_id = rows[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_rating_histogram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_phone_created_idx',
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='client_phone_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='rating',
+            name='client_phone_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_client_phone_key, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client_phone_key', '-created_at', '-id'], name='order_phone_key_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['client_phone_key'], name='rating_phone_key_idx'),
+        ),
+    ]
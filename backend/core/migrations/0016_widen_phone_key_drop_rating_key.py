@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_order_stock_reserved'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='rating',
+            name='rating_phone_key_idx',
+        ),
+        migrations.RemoveField(
+            model_name='rating',
+            name='client_phone_key',
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='client_phone_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=24),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# backend/core/mixins.py
+
+import hashlib
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from . import catalog_cache
+
+
+class CatalogCacheMixin:
+    """
+    Cache das respostas GET dos endpoints públicos do catálogo.
+    As respostas ficam no cache do Django por endpoint, produtor e página, e
+    são invalidadas pelos sinais de ProducerProfile, Product e Rating.
+    Também envia ETag e responde 304 quando o cliente já tem a versão atual.
+    """
+    # 'directory' para a lista de produtores, 'producer' para páginas de um produtor
+    cache_scope = catalog_cache.DIRECTORY_SCOPE
+
+    def get(self, request, *args, **kwargs):
+        producer_id = kwargs.get('pk') if self.cache_scope == catalog_cache.PRODUCER_SCOPE else None
+        key = catalog_cache.response_key(request, self.cache_scope, producer_id, type(self).__name__)
+
+        cached = cache.get(key)
+        if cached is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cached = (response.data, catalog_cache.compute_etag(response.data))
+            cache.set(key, cached, catalog_cache.cache_timeout())
+
+        data, etag = cached
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response
+
+
+class ConditionalListMixin:
+    """
+    GET condicional para listagens privadas (painel do produtor).
+    Calcula um validador barato — max(updated_at) e total de linhas do queryset
+    do usuário — em uma única consulta agregada, e responde 304 sem serializar
+    nada quando o cliente envia um If-None-Match ainda válido.
+    If-Modified-Since sozinho não basta: apagar uma linha não muda max(updated_at),
+    só o total, e a data não carrega o total. Nesse caso a resposta é sempre 200.
+    """
+
+    def get_validator_aggregates(self):
+        """Agregados que mudam sempre que a listagem muda. As views podem estender."""
+        return {'last_modified': Max('updated_at'), 'count': Count('id')}
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        validator = queryset.order_by().aggregate(**self.get_validator_aggregates())
+        last_modified = validator['last_modified']
+
+        # Cada página/filtro tem seu próprio ETag
+        raw = repr((sorted(validator.items()), request.GET.urlencode()))
+        etag = 'W/"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+        if self._not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def _not_modified(self, request, etag):
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        # Comparação fraca: ignora o prefixo W/
+        client_etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        return etag.removeprefix('W/') in client_etags or '*' in client_etags
@@ -1,7 +1,60 @@
 # backend/core/models.py
 
-from django.db import models
+from django.db import models, connection
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def normalize_phone(value):
+    """
+    Chave do telefone no formato E.164 (+5511987654321), para comparar e buscar
+    números digitados de formas diferentes ('(11) 98765-4321', '11987654321',
+    '+55 11 98765 4321'). Sem DDI, assume o Brasil (+55). Vazio se não houver dígitos.
+    """
+    value = (value or '').strip()
+    digits = ''.join(ch for ch in value if ch.isdigit())
+    if not digits:
+        return ''
+    if value.startswith('+'):
+        return '+' + digits
+    digits = digits.lstrip('0')  # prefixo de discagem (0xx)
+    if len(digits) in (12, 13) and digits.startswith('55'):
+        return '+' + digits
+    return '+55' + digits
+
+
+def empty_rating_histogram():
+    """Contagem de avaliações por nota: posição 0 = 1 estrela ... posição 4 = 5 estrelas."""
+    return [0] * 5
+
+
+class JSONGroupArray(models.Aggregate):
+    """Agregação JSON_GROUP_ARRAY do SQLite (equivalente ao ArrayAgg do Postgres)."""
+    function = 'JSON_GROUP_ARRAY'
+    allow_distinct = True
+    output_field = models.JSONField()
+
+
+class ProducerProfileQuerySet(models.QuerySet):
+    def with_categories(self):
+        """
+        Traz o usuário via JOIN e agrega as categorias dos produtos na mesma
+        consulta, evitando consultas extras por produtor no serializer.
+        """
+        if connection.vendor == 'postgresql':
+            from django.contrib.postgres.aggregates import ArrayAgg
+            categories = ArrayAgg('user__products__category', distinct=True)
+        else:
+            categories = JSONGroupArray('user__products__category', distinct=True)
+        return self.select_related('user').annotate(category_list=categories)
+
+    def directory(self):
+        """Queryset do diretório público: apenas produtores reais (sem staff/admin)."""
+        return self.filter(
+            user__is_staff=False,
+            user__is_superuser=False
+        ).with_categories()
+
 
 # Crie este novo modelo
 class ProducerProfile(models.Model):
@@ -12,8 +65,45 @@ class ProducerProfile(models.Model):
     city = models.CharField(max_length=100, blank=True, null=True)
     address = models.CharField(max_length=500, blank=True, null=True)
 
+    # Agregados de avaliação mantidos pelos sinais de Rating (evita Avg/Count por linha)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+    rating_histogram = models.JSONField(default=empty_rating_histogram)
+
+    # Texto normalizado (nome + cidade) usado pela busca; mantido pelos sinais
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    # Cidade normalizada e coordenadas do gazetteer local; mantidas pelos sinais
+    city_key = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+
+    objects = ProducerProfileQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Busca por raio: filtro de retângulo (bounding box) em latitude/longitude
+            models.Index(fields=['latitude', 'longitude'], name='producer_lat_lon_idx'),
+        ]
+
     def __str__(self):
         return self.name
+
+    def refresh_rating_aggregates(self, save=True):
+        """Recalcula os agregados de avaliação a partir da tabela Rating."""
+        histogram = empty_rating_histogram()
+        for score, count in (
+            Rating.objects.filter(producer_id=self.user_id, score__range=(1, 5))
+            .values_list('score').annotate(count=models.Count('id')).order_by()
+        ):
+            histogram[score - 1] = count
+        self.rating_histogram = histogram
+        self.rating_count = sum(histogram)
+        self.rating_sum = sum(count * score for score, count in enumerate(histogram, start=1))
+        self.rating_average = self.rating_sum / self.rating_count if self.rating_count else 0
+        if save:
+            self.save(update_fields=['rating_count', 'rating_sum', 'rating_average', 'rating_histogram'])
     
 # --- ADICIONE O MODELO ABAIXO ---
 class Product(models.Model):
@@ -28,9 +118,20 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Texto normalizado (nome + categoria) usado pela busca; mantido pelos sinais
+    search_document = models.TextField(blank=True, default='', editable=False)
+
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            # Listagem dos produtos do produtor (owner = ? ORDER BY -created_at)
+            models.Index(fields=['owner', '-created_at', '-id'], name='product_owner_created_idx'),
+            # Categorias distintas por produtor
+            models.Index(fields=['owner', 'category'], name='product_owner_category_idx'),
+        ]
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('Pendente', 'Pendente'),
@@ -39,15 +140,29 @@ class Order(models.Model):
         ('Entregue', 'Entregue'),
     ]
 
+    # Transições de status permitidas nas atualizações em lote
+    STATUS_TRANSITIONS = {
+        'Pendente': {'Aceito', 'Entregue', 'Cancelado'},
+        'Aceito': {'Entregue', 'Cancelado'},
+        'Cancelado': set(),
+        'Entregue': set(),
+    }
+
     # Produtor que receberá o pedido
     producer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='received_orders')
     # Nome e informações do cliente (não autenticado)
     client_name = models.CharField(max_length=255)
     client_phone = models.CharField(max_length=20)
+    # Telefone normalizado (E.164) usado na consulta de pedidos pelo cliente; mantido pelos sinais.
+    # Cabe o pior caso de normalize_phone: '+55' mais os 20 caracteres de client_phone
+    client_phone_key = models.CharField(max_length=24, blank=True, default='', editable=False)
     client_email = models.EmailField(blank=True, null=True)
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pendente')
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Indica se o estoque foi baixado na criação; só então o cancelamento o devolve
+    # (pedidos anteriores à reserva de estoque ficam com False)
+    stock_reserved = models.BooleanField(default=False, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -57,6 +172,12 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pedidos do produtor (producer = ? ORDER BY -created_at)
+            models.Index(fields=['producer', '-created_at', '-id'], name='order_producer_created_idx'),
+            # Consulta de pedidos pelo telefone do cliente (chave normalizada)
+            models.Index(fields=['client_phone_key', '-created_at', '-id'], name='order_phone_key_created_idx'),
+        ]
 
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
@@ -86,6 +207,16 @@ class Rating(models.Model):
         ordering = ['-created_at']
         # Garante que cada pedido só pode ter uma avaliação
         unique_together = ['order']
+        indexes = [
+            # Avaliações do produtor (producer = ? ORDER BY -created_at)
+            models.Index(fields=['producer', '-created_at', '-id'], name='rating_producer_created_idx'),
+            # Comentários recentes do produtor (resumo público): só linhas com comentário
+            models.Index(
+                fields=['producer', '-created_at', '-id'],
+                name='rating_commented_idx',
+                condition=models.Q(comment__gt=''),
+            ),
+        ]
 
     def __str__(self):
         return f"Avaliação {self.score}/5 - {self.producer.producer_profile.name}"
@@ -95,4 +226,104 @@ class Rating(models.Model):
         if self.score < 1 or self.score > 5:
             raise ValidationError('A avaliação deve ser entre 1 e 5.')
         if self.order.status != 'Entregue':
-            raise ValidationError('Só é possível avaliar pedidos entregues.')
\ No newline at end of file
+            raise ValidationError('Só é possível avaliar pedidos entregues.')
+
+class ProducerSalesDaily(models.Model):
+    """
+    Resumo diário de vendas do produtor (dia de criação do pedido).
+    Mantido de forma incremental quando o pedido é entregue ou cancelado
+    (core.analytics) e reconstruído pelo comando rebuild_sales_rollups.
+    """
+    producer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sales_daily')
+    day = models.DateField()
+    delivered_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    cancelled_value = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['producer', 'day'], name='producer_sales_daily_unique'),
+        ]
+
+    def __str__(self):
+        return f"Vendas {self.day} - produtor {self.producer_id}"
+
+
+class ProductSalesDaily(models.Model):
+    """Resumo diário de vendas por produto, com a mesma regra de ProducerSalesDaily."""
+    producer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='product_sales_daily')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_daily')
+    product_name = models.CharField(max_length=255)  # Nome no pedido, para histórico
+    day = models.DateField()
+    delivered_orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    cancelled_quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='product_sales_daily_unique'),
+        ]
+        indexes = [
+            # Ranking de produtos do produtor num intervalo (producer = ? AND day BETWEEN ...)
+            models.Index(fields=['producer', 'day'], name='product_sales_producer_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"Vendas {self.day} - {self.product_name}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento gravado na mesma transação da mudança que o originou (outbox transacional).
+    O comando run_outbox_worker lê os pendentes e entrega fora do ciclo da requisição.
+    """
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Próxima tentativa (atrasada a cada falha) e quando foi entregue
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Fila: só os pendentes, na ordem de disponibilidade
+            models.Index(
+                fields=['available_at', 'id'], name='outbox_pending_idx',
+                condition=models.Q(processed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
+
+
+class ProducerNotification(models.Model):
+    """Notificação entregue ao produtor pelo worker do outbox (ex.: novo pedido)."""
+    producer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    event = models.ForeignKey(OutboxEvent, on_delete=models.SET_NULL, blank=True, null=True, related_name='notifications')
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-id']
+        constraints = [
+            # Reprocessar um evento não duplica a notificação
+            models.UniqueConstraint(fields=['event', 'producer'], name='notification_event_producer_unique'),
+        ]
+        indexes = [
+            # Notificações do produtor a partir de um id (?after= e reconexão do stream)
+            models.Index(fields=['producer', 'id'], name='notification_producer_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - produtor {self.producer_id}"
@@ -0,0 +1,152 @@
+# backend/core/outbox.py
+
+"""
+Outbox transacional: os eventos são gravados na mesma transação da mudança
+(ex.: criação do pedido) e entregues depois pelo comando run_outbox_worker,
+usando o próprio banco como fila — sem broker externo.
+"""
+
+import logging
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from .models import OutboxEvent, ProducerNotification
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = 'order.created'
+ORDER_STATUS_CHANGED = 'order.status_changed'
+
+MAX_ATTEMPTS = 8
+
+# Tipo do evento -> função que o entrega; cada handler recebe o OutboxEvent
+HANDLERS = {}
+
+
+class SkipEvent(Exception):
+    """O handler desiste do evento sem nova tentativa (ex.: o produtor foi removido)."""
+
+
+def handler(event_type):
+    def register(function):
+        HANDLERS[event_type] = function
+        return function
+    return register
+
+
+def enqueue(event_type, payload):
+    """Grava o evento; chame dentro da transação da mudança para que os dois sejam atômicos."""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def enqueue_order_created(order, items):
+    return enqueue(ORDER_CREATED, {
+        'order_id': order.id,
+        'producer_id': order.producer_id,
+        'client_name': order.client_name,
+        'total_price': str(order.total_price),
+        'items': [{'product_name': item.product_name, 'quantity': item.quantity} for item in items],
+        'created_at': order.created_at.isoformat(),
+    })
+
+
+def enqueue_status_changes(producer_id, previous_statuses, new_status):
+    """Um evento por pedido que mudou de status; 'previous_statuses' é {id do pedido: status anterior}."""
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=ORDER_STATUS_CHANGED, payload={
+            'order_id': order_id,
+            'producer_id': producer_id,
+            'previous_status': previous,
+            'status': new_status,
+        })
+        for order_id, previous in previous_statuses.items() if previous != new_status
+    ])
+
+
+@handler(ORDER_CREATED)
+@handler(ORDER_STATUS_CHANGED)
+def notify_producer(event):
+    payload = event.payload
+    producer_id = payload['producer_id']
+    if not User.objects.filter(pk=producer_id).exists():
+        raise SkipEvent(f'Produtor {producer_id} não existe mais.')
+    try:
+        # Savepoint próprio: o conflito não derruba a transação do evento
+        with transaction.atomic():
+            ProducerNotification.objects.create(
+                producer_id=producer_id, event=event, kind=event.event_type, payload=payload,
+            )
+    except IntegrityError:
+        # Já entregue numa tentativa anterior (constraint event + producer); senão é a chave
+        # estrangeira (produtor removido depois da verificação) e o evento volta para a fila
+        if not ProducerNotification.objects.filter(event=event, producer_id=producer_id).exists():
+            raise
+
+
+def _retry_delay(attempts):
+    """Espera exponencial entre tentativas: 2s, 4s, 8s... até 10 minutos."""
+    return timedelta(seconds=min(2 ** attempts, 600))
+
+
+def _claim_next(now):
+    """Próximo evento pendente, travado até o fim da transação do evento."""
+    pending = OutboxEvent.objects.filter(processed_at__isnull=True, available_at__lte=now).order_by('available_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    return pending.first()
+
+
+def _deliver(event, now):
+    event.attempts += 1
+    try:
+        with transaction.atomic():
+            deliver = HANDLERS.get(event.event_type)
+            if deliver is None:
+                raise LookupError(f'Nenhum handler para {event.event_type}')
+            deliver(event)
+    except SkipEvent as exc:
+        # Sem destino: marcado como processado, com o motivo registrado
+        logger.warning('Evento %s descartado: %s', event.pk, exc)
+        event.processed_at = now
+        event.last_error = f'Descartado: {exc}'
+    except Exception as exc:  # A falha de um evento não impede os demais
+        logger.exception('Falha ao entregar o evento %s', event.pk)
+        event.last_error = f'{type(exc).__name__}: {exc}'
+        if event.attempts >= MAX_ATTEMPTS:
+            # Desiste: fica marcado como processado, com o erro registrado
+            event.processed_at = now
+        else:
+            event.available_at = now + _retry_delay(event.attempts)
+    else:
+        event.processed_at = now
+        event.last_error = ''
+    event.save(update_fields=['attempts', 'processed_at', 'available_at', 'last_error'])
+
+
+def process_batch(limit=100):
+    """
+    Entrega até 'limit' eventos pendentes; retorna quantos foram lidos
+    (entregues, descartados ou reagendados).
+    Cada evento tem a própria transação: uma falha ao gravar um evento não desfaz as
+    entregas anteriores, e o worker só trava o evento que está entregando. No Postgres,
+    SKIP LOCKED permite vários workers em paralelo sem pegar o mesmo evento.
+    """
+    now = timezone.now()
+    handled = 0
+    while handled < limit:
+        with transaction.atomic():
+            event = _claim_next(now)
+            if event is None:
+                break
+            handled += 1
+            # Eventos reagendados ficam com available_at > now e não voltam neste lote
+            _deliver(event, now)
+    return handled
+
+
+def purge_processed(older_than_days):
+    """Remove eventos já entregues há mais de N dias (as notificações ficam)."""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,52 @@
+# backend/core/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) na ordenação '-created_at'.
+    O custo de cada página não cresce com o tamanho da tabela,
+    ao contrário de LIMIT/OFFSET.
+    O cliente pode escolher o tamanho da página com ?page_size=, até max_page_size.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ProductCursorPagination(CreatedAtCursorPagination):
+    page_size = 50
+    max_page_size = 200
+
+
+class OrderCursorPagination(CreatedAtCursorPagination):
+    page_size = 20
+    max_page_size = 100
+
+
+class RatingCursorPagination(CreatedAtCursorPagination):
+    page_size = 10
+    max_page_size = 50
+
+
+class ProducerCursorPagination(CreatedAtCursorPagination):
+    """Diretório de produtores, ordenado por nome."""
+    ordering = ('name', 'id')
+    page_size = 30
+    max_page_size = 100
+
+
+class SearchCursorPagination(CreatedAtCursorPagination):
+    """Resultados da busca, do mais relevante para o menos relevante."""
+    ordering = ('-rank', 'id')
+    page_size = 20
+    max_page_size = 50
+
+
+class NotificationCursorPagination(CreatedAtCursorPagination):
+    """Notificações do produtor, mais recentes primeiro (id cresce com o tempo)."""
+    ordering = ('-id',)
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,12 @@
+# backend/core/parsers.py
+
+from rest_framework.parsers import BaseParser
+
+
+class CSVTextParser(BaseParser):
+    """Aceita o corpo da requisição como CSV (text/csv) e devolve o texto."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        # utf-8-sig remove o BOM que o Excel coloca no início do arquivo
+        return stream.read().decode('utf-8-sig')
@@ -0,0 +1,151 @@
+# backend/core/product_import.py
+
+import csv
+import io
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .catalog_cache import invalidate_producer
+from .models import ProducerProfile, Product
+from .search import build_document
+from .serializers import ProductSerializer
+
+IMPORT_FIELDS = ['id', 'name', 'category', 'status', 'stock', 'price']
+MAX_ROWS = 10000
+BATCH_SIZE = 1000
+# bulk_update gera um CASE por coluna: lotes grandes ficam quadráticos no banco
+UPDATE_BATCH_SIZE = 200
+
+
+def parse_csv(text):
+    """Linhas do CSV como dicionários; células vazias são ignoradas (não alteram o produto)."""
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value not in (None, '')}
+        for row in reader
+    ]
+
+
+def _row_errors(index, errors):
+    return {"row": index, "errors": errors}
+
+
+def _product_id(value):
+    """Id numérico da linha, ou None ('12a', '1.5', '²' etc. não são ids)."""
+    value = str(value).strip()
+    return int(value) if value.isdecimal() else None
+
+
+def upsert_products(owner, rows, skip_invalid=False):
+    """
+    Cria ou atualiza produtos do produtor em lote.
+    Cada linha é associada a um produto existente pelo 'id' ou, sem id, pelo nome;
+    linhas sem correspondência criam produtos novos. Os produtos existentes são
+    carregados em uma única consulta, travados até o fim da transação (para que um
+    pedido ou outra importação não grave por cima), e a escrita é feita com
+    bulk_update/bulk_create. Sem skip_invalid, qualquer linha inválida cancela o lote inteiro.
+    """
+    if len(rows) > MAX_ROWS:
+        return {"created": 0, "updated": 0, "errors": [_row_errors(None, f"Máximo de {MAX_ROWS} linhas por lote.")]}
+
+    ids = set()
+    names = set()
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        if row.get('id') not in (None, ''):
+            product_id = _product_id(row['id'])
+            if product_id is not None:
+                ids.add(product_id)
+        elif row.get('name'):
+            names.add(str(row['name']).strip())
+
+    with transaction.atomic():
+        existing = (
+            Product.objects.select_for_update()
+            .filter(owner=owner).filter(Q(pk__in=ids) | Q(name__in=names))
+            .order_by('pk')
+        )
+        by_id = {}
+        by_name = {}
+        for product in existing:
+            by_id[product.pk] = product
+            by_name.setdefault(product.name, []).append(product)
+
+        errors = []
+        to_create = []
+        # Produtos agrupados pelas colunas alteradas: cada linha grava só os próprios campos
+        to_update = {}
+        updated_ids = set()
+        seen_names = set()
+        now = timezone.now()
+
+        for index, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                errors.append(_row_errors(index, "Linha inválida."))
+                continue
+
+            data = {key: row[key] for key in IMPORT_FIELDS if key in row}
+            product_id = data.pop('id', None)
+            if product_id not in (None, ''):
+                product_id = _product_id(product_id)
+                instance = by_id.get(product_id) if product_id is not None else None
+                if instance is None:
+                    errors.append(_row_errors(index, {"id": "Produto não encontrado."}))
+                    continue
+            else:
+                matches = by_name.get(str(data.get('name', '')).strip(), [])
+                if len(matches) > 1:
+                    errors.append(_row_errors(index, {"name": "Mais de um produto com este nome; informe o id."}))
+                    continue
+                instance = matches[0] if matches else None
+
+            # Mesmas regras do cadastro unitário; atualizações podem mandar só alguns campos
+            serializer = ProductSerializer(instance, data=data, partial=instance is not None)
+            if not serializer.is_valid():
+                errors.append(_row_errors(index, serializer.errors))
+                continue
+            values = serializer.validated_data
+
+            if instance is None:
+                if values['name'] in seen_names:
+                    errors.append(_row_errors(index, {"name": "Produto repetido no lote."}))
+                    continue
+                seen_names.add(values['name'])
+                product = Product(owner=owner, **values)
+                product.search_document = build_document(product.name, product.category)
+                to_create.append(product)
+            else:
+                if instance.pk in updated_ids:
+                    errors.append(_row_errors(index, {"id": "Produto repetido no lote."}))
+                    continue
+                updated_ids.add(instance.pk)
+                if not values:
+                    continue
+                for field, value in values.items():
+                    setattr(instance, field, value)
+                fields = set(values)
+                # bulk_update não dispara sinais: o documento de busca é refeito aqui
+                if 'name' in values or 'category' in values:
+                    instance.search_document = build_document(instance.name, instance.category)
+                    fields.add('search_document')
+                to_update.setdefault(tuple(sorted(fields)), []).append(instance)
+
+        if errors and not skip_invalid:
+            return {"created": 0, "updated": 0, "errors": errors}
+
+        for fields, products in to_update.items():
+            # Cada coluna vira um CASE por produto: só as do grupo
+            Product.objects.bulk_update(products, fields, batch_size=UPDATE_BATCH_SIZE)
+        if updated_ids:
+            # Nem auto_now: updated_at é igual para o lote inteiro, basta um UPDATE simples
+            ids = sorted(updated_ids)
+            for start in range(0, len(ids), BATCH_SIZE):
+                Product.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).update(updated_at=now)
+        if to_create:
+            Product.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if updated_ids or to_create:
+            profile_id = ProducerProfile.objects.filter(user=owner).values_list('pk', flat=True).first()
+            invalidate_producer(profile_id)
+
+    return {"created": len(to_create), "updated": len(updated_ids), "errors": errors}
@@ -0,0 +1,149 @@
+# backend/core/search.py
+
+import bisect
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from django.db import connection
+from django.db.models import Case, FloatField, Value, When
+from . import catalog_cache
+
+# Palavras muito comuns em português que não ajudam na busca
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'uns', 'umas', 'com', 'sem', 'para', 'pra', 'por', 'ao', 'aos', 'ou',
+}
+
+# Plurais comuns em português (já sem acento): limões -> limao, pães -> pao, flores -> flor
+PLURAL_SUFFIXES = (
+    ('oes', 'ao'),
+    ('aes', 'ao'),
+    ('ais', 'al'),
+    ('eis', 'el'),
+    ('res', 'r'),
+    ('zes', 'z'),
+    ('ns', 'm'),
+    ('s', ''),
+)
+
+MAX_FALLBACK_HITS = 1000
+
+
+def strip_accents(text):
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token):
+    """Reduz plurais simples ao singular para que 'tomates' encontre 'tomate'."""
+    for suffix, replacement in PLURAL_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)] + replacement
+    return token
+
+
+def tokenize(text):
+    """Minúsculas, sem acentos, sem pontuação, sem stopwords e no singular."""
+    words = re.findall(r'[a-z0-9]+', strip_accents(text or '').lower())
+    return [stem(word) for word in words if word not in STOPWORDS and len(word) > 1]
+
+
+def build_document(*parts):
+    """Documento de busca salvo no modelo: tokens normalizados, sem repetição."""
+    tokens = []
+    for part in parts:
+        for token in tokenize(part):
+            if token not in tokens:
+                tokens.append(token)
+    return ' '.join(tokens)
+
+
+class InvertedIndex:
+    """Índice invertido em memória (token -> ids), usado quando não há Postgres."""
+
+    def __init__(self, rows):
+        self.postings = defaultdict(set)
+        self.lengths = {}
+        for pk, document in rows:
+            tokens = document.split()
+            self.lengths[pk] = len(tokens)
+            for token in tokens:
+                self.postings[token].add(pk)
+        self.vocabulary = sorted(self.postings)
+
+    def _matches(self, term):
+        """Ids com o termo exato (peso 1) ou com um token que começa pelo termo (peso 0.5)."""
+        scores = {pk: 1.0 for pk in self.postings.get(term, ())}
+        if len(term) >= 3:
+            # Vocabulário ordenado: os tokens com o prefixo ficam contíguos
+            position = bisect.bisect_left(self.vocabulary, term)
+            while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+                for pk in self.postings[self.vocabulary[position]]:
+                    scores.setdefault(pk, 0.5)
+                position += 1
+        return scores
+
+    def search(self, terms, limit=MAX_FALLBACK_HITS):
+        """Todos os termos precisam aparecer; documentos curtos ganham um pouco de peso."""
+        result = None
+        for term in terms:
+            matches = self._matches(term)
+            if result is None:
+                result = matches
+            else:
+                result = {pk: score + matches[pk] for pk, score in result.items() if pk in matches}
+            if not result:
+                return {}
+        ranked = {pk: score / (1 + 0.1 * self.lengths[pk]) for pk, score in (result or {}).items()}
+        top = sorted(ranked.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return dict(top)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _fallback_index(queryset):
+    """
+    Índice do processo para os filtros do queryset (ex.: só produtos ativos), assim o
+    limite de resultados vale depois do filtro. Reconstruído quando o catálogo muda
+    (versão do cache do diretório). Os querysets vêm das views, não do usuário, então
+    há poucas chaves.
+    """
+    rows = queryset.exclude(search_document='').values_list('pk', 'search_document')
+    key = str(rows.query)
+    version = catalog_cache.get_version(catalog_cache.DIRECTORY_SCOPE)
+    cached = _indexes.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    with _indexes_lock:
+        index = InvertedIndex(rows.iterator())
+        _indexes[key] = (version, index)
+    return index
+
+
+def search_queryset(queryset, query):
+    """
+    Filtra o queryset pelo texto e anota 'rank'.
+    No Postgres usa to_tsvector/to_tsquery (índice GIN sobre search_document);
+    nos demais bancos usa o índice invertido em memória.
+    """
+    # Mesmo vazio, o queryset precisa de 'rank' para a paginação por cursor
+    empty = queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+    terms = tokenize(query)
+    if not terms:
+        return empty
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+        vector = SearchVector('search_document', config='simple')
+        tsquery = SearchQuery(' & '.join(f'{term}:*' for term in terms), config='simple', search_type='raw')
+        # O filtro usa a mesma expressão do índice GIN criado na migração
+        return queryset.annotate(search=vector, rank=SearchRank(vector, tsquery)).filter(search=tsquery)
+
+    hits = _fallback_index(queryset).search(terms)
+    if not hits:
+        return empty
+    rank = Case(*[When(pk=pk, then=Value(score)) for pk, score in hits.items()], output_field=FloatField())
+    return queryset.filter(pk__in=hits.keys()).annotate(rank=rank)
@@ -1,9 +1,11 @@
 # backend/core/serializers.py
 
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from dj_rest_auth.registration.serializers import RegisterSerializer
-from .models import ProducerProfile, Product, Order, OrderItem, Rating
-from django.db.models import Avg 
+from .models import ProducerProfile, Product, Order, OrderItem, Rating, ProducerNotification, normalize_phone
+from .stock import OutOfStock, order_quantities, reserve_stock
+from .outbox import enqueue_order_created
 
 class ProducerRegisterSerializer(RegisterSerializer):
     # Definimos os campos extras que virão do formulário
@@ -25,7 +27,8 @@ class ProducerRegisterSerializer(RegisterSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        # Lista explícita: campos internos (ex.: search_document) não vão para a API
+        fields = ('id', 'owner', 'name', 'category', 'status', 'stock', 'price', 'created_at', 'updated_at')
         # O campo 'owner' não será enviado pelo frontend, ele será definido automaticamente.
         read_only_fields = ('owner', 'created_at', 'updated_at')
 
@@ -53,6 +56,16 @@ class ProductSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A categoria é obrigatória.")
         return value.strip()
     
+class ProductSearchSerializer(serializers.ModelSerializer):
+    """Produto nos resultados da busca, com o produtor para o link da fazenda."""
+    producer_id = serializers.IntegerField(source='owner.producer_profile.id', read_only=True)
+    producer_name = serializers.CharField(source='owner.producer_profile.name', read_only=True)
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'category', 'price', 'stock', 'producer_id', 'producer_name', 'rank']
+
 class ProducerProfileSerializer(serializers.ModelSerializer):
     categories = serializers.SerializerMethodField()
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -62,24 +75,27 @@ class ProducerProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProducerProfile
         # Selecionamos os campos que queremos expor na API
-        fields = ['id', 'name', 'cpf_cnpj', 'phone', 'city', 'address', 'email', 'user_id', 'categories', 'average_rating', 'total_ratings']
+        fields = ['id', 'name', 'cpf_cnpj', 'phone', 'city', 'address', 'email', 'user_id', 'categories', 'average_rating', 'total_ratings',
+                  'latitude', 'longitude']
         # CPF/CNPJ e email são read-only (não podem ser alterados)
-        read_only_fields = ['id', 'cpf_cnpj', 'user_id', 'email', 'average_rating', 'total_ratings']
+        read_only_fields = ['id', 'cpf_cnpj', 'user_id', 'email', 'average_rating', 'total_ratings', 'latitude', 'longitude']
 
     def get_categories(self, obj):
         """Retorna lista de categorias únicas dos produtos deste produtor"""
+        # Usa a agregação feita no queryset do diretório quando disponível
+        if hasattr(obj, 'category_list'):
+            return [category for category in obj.category_list or [] if category]
         products = Product.objects.filter(owner=obj.user)
         categories = products.values_list('category', flat=True).distinct()
         return list(categories)
 
     def get_average_rating(self, obj):
-        """Calcula a média das avaliações do produtor"""
-        avg = Rating.objects.filter(producer=obj.user).aggregate(Avg('score'))['score__avg']
-        return round(avg, 1) if avg else 0
+        """Retorna a média das avaliações, lida do agregado mantido no perfil"""
+        return round(obj.rating_average, 1) if obj.rating_count else 0
 
     def get_total_ratings(self, obj):
-        """Retorna o total de avaliações do produtor"""
-        return Rating.objects.filter(producer=obj.user).count()
+        """Retorna o total de avaliações, lido do agregado mantido no perfil"""
+        return obj.rating_count
 
     def validate_name(self, value):
         """Valida que o nome não seja vazio."""
@@ -93,11 +109,31 @@ class ProducerProfileSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Telefone inválido. Digite um número válido.")
         return value.strip() if value else value
 
+class ProducerSearchSerializer(ProducerProfileSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ProducerProfileSerializer.Meta):
+        fields = ProducerProfileSerializer.Meta.fields + ['rank']
+
+class ProducerNearbySerializer(ProducerProfileSerializer):
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(ProducerProfileSerializer.Meta):
+        fields = ProducerProfileSerializer.Meta.fields + ['distance_km']
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 1)
+
 class OrderItemSerializer(serializers.ModelSerializer):
+    # ID simples: os produtos são carregados de uma vez em OrderSerializer.validate
+    product = serializers.IntegerField(source='product_id')
+
     class Meta:
         model = OrderItem
         fields = ['id', 'product', 'product_name', 'quantity', 'unit_price', 'subtotal']
-        read_only_fields = ['id']
+        # Nome e preços são copiados do produto no servidor, não aceitos do cliente
+        read_only_fields = ['id', 'product_name', 'unit_price', 'subtotal']
+        extra_kwargs = {'quantity': {'min_value': 1}}
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
@@ -109,7 +145,17 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ['id', 'producer', 'producer_name', 'client_name', 'client_phone', 'client_email',
                   'status', 'total_price', 'items', 'created_at', 'updated_at', 'has_rating', 'rating_score']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'has_rating', 'rating_score']
+        read_only_fields = ['id', 'total_price', 'created_at', 'updated_at', 'has_rating', 'rating_score']
+
+    def get_fields(self):
+        """
+        Em pedidos existentes o status só muda por update_status/bulk_update_status,
+        que devolvem o estoque e registram rollups e eventos; o PATCH genérico o ignora.
+        """
+        fields = super().get_fields()
+        if self.instance is not None:
+            fields['status'].read_only = True
+        return fields
 
     def get_has_rating(self, obj):
         """Verifica se o pedido já foi avaliado"""
@@ -119,12 +165,65 @@ class OrderSerializer(serializers.ModelSerializer):
         """Retorna a nota da avaliação se existir"""
         return obj.rating.score if hasattr(obj, 'rating') else None
 
+    def validate(self, data):
+        """Carrega todos os produtos do pedido em uma única consulta e valida os itens"""
+        if self.instance is not None:
+            return data
+
+        items_data = data.get('items')
+        if not items_data:
+            raise serializers.ValidationError({"items": "O pedido precisa ter ao menos um item."})
+
+        product_ids = {item['product_id'] for item in items_data}
+        products = Product.objects.in_bulk(product_ids)
+
+        missing = product_ids - products.keys()
+        if missing:
+            raise serializers.ValidationError({"items": f"Produto(s) não encontrado(s): {sorted(missing)}."})
+
+        producer = data.get('producer')
+        for product in products.values():
+            if product.owner_id != producer.id:
+                raise serializers.ValidationError({"items": f"O produto '{product.name}' não pertence a este produtor."})
+            if product.status != 'Ativo':
+                raise serializers.ValidationError({"items": f"O produto '{product.name}' não está disponível."})
+
+        self._products = products
+        return data
+
     def create(self, validated_data):
         items_data = validated_data.pop('items')
-        order = Order.objects.create(**validated_data)
+        products = self._products
 
+        # Nome e preço são copiados do produto no momento do pedido (histórico)
+        items = []
         for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
+            product = products[item_data['product_id']]
+            quantity = item_data['quantity']
+            items.append(OrderItem(
+                product=product,
+                product_name=product.name,
+                quantity=quantity,
+                unit_price=product.price,
+                subtotal=product.price * quantity,
+            ))
+
+        validated_data['total_price'] = sum(item.subtotal for item in items)
+
+        with transaction.atomic():
+            try:
+                reserve_stock(order_quantities(items))
+            except OutOfStock as exc:
+                raise serializers.ValidationError(
+                    {"items": [f"Estoque insuficiente para o produto '{products[exc.product_id].name}'."]}
+                )
+
+            order = Order.objects.create(stock_reserved=True, **validated_data)
+            for item in items:
+                item.order = order
+            OrderItem.objects.bulk_create(items)
+            # Notificação ao produtor sai pelo outbox, na mesma transação do pedido
+            enqueue_order_created(order, items)
 
         return order
 
@@ -136,8 +235,16 @@ class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     def validate_status(self, value):
         if value not in ['Pendente', 'Aceito', 'Cancelado', 'Entregue']:
             raise serializers.ValidationError("Status inválido.")
+        # Mesma máquina de estados do bulk_update_status; repetir o status atual não muda nada
+        current = self.instance.status if self.instance is not None else None
+        if current is not None and value != current and value not in Order.STATUS_TRANSITIONS[current]:
+            raise serializers.ValidationError(f"Não é possível mudar um pedido de '{current}' para '{value}'.")
         return value
 
+class OrderBulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
 class RatingSerializer(serializers.ModelSerializer):
     producer_name = serializers.CharField(source='producer.producer_profile.name', read_only=True)
     order_id = serializers.IntegerField(write_only=True)
@@ -153,30 +260,65 @@ class RatingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("A avaliação deve ser entre 1 e 5.")
         return value
 
-    def validate(self, data):
-        """Valida que o pedido existe, está entregue e não foi avaliado"""
-        order_id = data.get('order_id')
-
+    def create(self, validated_data):
+        """
+        Valida o pedido e grava a avaliação com uma leitura travada e um INSERT.
+        Avaliação repetida é barrada pela restrição única em order (IntegrityError),
+        sem consulta prévia.
+        """
+        order_id = validated_data.pop('order_id')
         try:
-            order = Order.objects.get(id=order_id)
-        except Order.DoesNotExist:
-            raise serializers.ValidationError({"order_id": "Pedido não encontrado."})
+            with transaction.atomic():
+                # Trava o pedido para que o status não mude entre a checagem e o INSERT;
+                # o perfil do produtor vem no JOIN e é usado no producer_name da resposta
+                order = (
+                    Order.objects.select_for_update(of=('self',))
+                    .select_related('producer__producer_profile')
+                    .filter(pk=order_id)
+                    .first()
+                )
+                if order is None:
+                    raise serializers.ValidationError({"order_id": "Pedido não encontrado."})
+                if order.status != 'Entregue':
+                    raise serializers.ValidationError({"order_id": "Só é possível avaliar pedidos entregues."})
+                # Chave E.164 do pedido, já gravada pelos sinais
+                if order.client_phone_key != normalize_phone(validated_data['client_phone']):
+                    raise serializers.ValidationError({"client_phone": "O telefone não confere com o do pedido."})
+                return Rating.objects.create(order=order, producer=order.producer, **validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({"order_id": "Este pedido já foi avaliado."})
 
-        # Verifica se o pedido foi entregue
-        if order.status != 'Entregue':
-            raise serializers.ValidationError({"order_id": "Só é possível avaliar pedidos entregues."})
+class RatingReviewSerializer(serializers.ModelSerializer):
+    """Avaliação exibida no resumo público do produtor (sem o telefone do cliente)."""
 
-        # Verifica se já existe avaliação para este pedido
-        if hasattr(order, 'rating'):
-            raise serializers.ValidationError({"order_id": "Este pedido já foi avaliado."})
+    class Meta:
+        model = Rating
+        fields = ['id', 'client_name', 'score', 'comment', 'created_at']
+        read_only_fields = fields
 
-        # Adiciona o pedido e o produtor aos dados validados
-        data['order'] = order
-        data['producer'] = order.producer
 
-        return data
+class ProducerRatingSummarySerializer(serializers.ModelSerializer):
+    """Resumo das avaliações lido dos agregados do perfil, mais os comentários recentes."""
+    producer_id = serializers.IntegerField(source='id', read_only=True)
+    average = serializers.SerializerMethodField()
+    count = serializers.IntegerField(source='rating_count', read_only=True)
+    histogram = serializers.SerializerMethodField()
+    recent_reviews = RatingReviewSerializer(many=True, read_only=True)
 
-    def create(self, validated_data):
-        # Remove order_id pois já temos o objeto order
-        validated_data.pop('order_id', None)
-        return super().create(validated_data)
\ No newline at end of file
+    class Meta:
+        model = ProducerProfile
+        fields = ['producer_id', 'average', 'count', 'histogram', 'recent_reviews']
+
+    def get_average(self, obj):
+        return round(obj.rating_average, 1) if obj.rating_count else 0
+
+    def get_histogram(self, obj):
+        """Quantidade de avaliações por nota, de '1' a '5'"""
+        return {str(score): count for score, count in enumerate(obj.rating_histogram, start=1)}
+
+
+class ProducerNotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProducerNotification
+        fields = ['id', 'kind', 'payload', 'created_at', 'read_at']
+        read_only_fields = fields
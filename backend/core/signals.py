@@ -0,0 +1,108 @@
+# backend/core/signals.py
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from .models import ProducerProfile, Product, Order, Rating, normalize_phone
+from .catalog_cache import invalidate_producer
+from .authentication import forget_token, forget_user
+from .search import build_document
+from .geo import city_key, locate_city
+
+
+def _apply_rating_delta(producer_id, score, delta):
+    """
+    Atualiza os agregados de avaliação do produtor (totais e histograma por nota)
+    dentro de uma transação, travando a linha do perfil para que avaliações
+    simultâneas não se percam.
+    """
+    with transaction.atomic():
+        profile = ProducerProfile.objects.select_for_update().filter(user_id=producer_id).first()
+        if profile is None:
+            return
+        if not 1 <= score <= 5 or len(profile.rating_histogram) != 5:
+            # Fora do formato esperado: recalcula a partir da tabela
+            profile.refresh_rating_aggregates()
+            return
+        profile.rating_histogram[score - 1] = max(profile.rating_histogram[score - 1] + delta, 0)
+        profile.rating_count = max(profile.rating_count + delta, 0)
+        profile.rating_sum = max(profile.rating_sum + delta * score, 0)
+        profile.rating_average = profile.rating_sum / profile.rating_count if profile.rating_count else 0
+        profile.save(update_fields=['rating_count', 'rating_sum', 'rating_average', 'rating_histogram'])
+
+
+@receiver(post_save, sender=Rating)
+def rating_saved(sender, instance, created, **kwargs):
+    if created:
+        _apply_rating_delta(instance.producer_id, instance.score, 1)
+        return
+    # Edição de uma avaliação existente: recalcula a partir da tabela
+    with transaction.atomic():
+        profile = ProducerProfile.objects.select_for_update().filter(user_id=instance.producer_id).first()
+        if profile is not None:
+            profile.refresh_rating_aggregates()
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    _apply_rating_delta(instance.producer_id, instance.score, -1)
+
+
+def _profile_id_for_user(user_id):
+    return ProducerProfile.objects.filter(user_id=user_id).values_list('pk', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=ProducerProfile)
+def producer_profile_changed(sender, instance, **kwargs):
+    # Novas avaliações também passam por aqui, ao salvar os agregados do perfil
+    invalidate_producer(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    invalidate_producer(_profile_id_for_user(instance.owner_id))
+
+
+@receiver(pre_save, sender=ProducerProfile)
+def producer_profile_search_document(sender, instance, **kwargs):
+    instance.search_document = build_document(instance.name, instance.city)
+
+
+@receiver(pre_save, sender=ProducerProfile)
+def producer_profile_location(sender, instance, **kwargs):
+    """
+    Preenche a chave da cidade e as coordenadas a partir do gazetteer local.
+    Cidade fora do gazetteer limpa as coordenadas, para o produtor não continuar na cidade antiga.
+    """
+    instance.city_key = city_key(instance.city)
+    instance.latitude, instance.longitude = locate_city(instance.city) or (None, None)
+
+
+@receiver(pre_save, sender=Product)
+def product_search_document(sender, instance, **kwargs):
+    instance.search_document = build_document(instance.name, instance.category)
+
+
+@receiver(pre_save, sender=Order)
+def client_phone_key(sender, instance, **kwargs):
+    instance.client_phone_key = normalize_phone(instance.client_phone)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Desativação, troca de permissão etc. valem na hora neste processo
+    forget_user(instance.pk)
+    # O email do usuário aparece no perfil público; o login só grava last_login
+    update_fields = kwargs.get('update_fields')
+    if kwargs.get('signal') is post_save and not (update_fields and set(update_fields) <= {'last_login'}):
+        profile_id = _profile_id_for_user(instance.pk)
+        if profile_id:
+            invalidate_producer(profile_id)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Logout apaga o Token: a chave deixa de valer mesmo se estiver no cache
+    forget_token(instance.key)
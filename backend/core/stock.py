@@ -0,0 +1,60 @@
+# backend/core/stock.py
+
+from collections import Counter
+from django.db.models import F
+from django.utils import timezone
+from .models import ProducerProfile, Product
+from .catalog_cache import invalidate_producer
+
+
+class OutOfStock(Exception):
+    """Estoque insuficiente para reservar um produto do pedido."""
+
+    def __init__(self, product_id):
+        self.product_id = product_id
+        super().__init__(f'Estoque insuficiente para o produto {product_id}.')
+
+
+def order_quantities(items):
+    """Soma as quantidades por produto (um mesmo produto pode aparecer em mais de um item)."""
+    quantities = Counter()
+    for item in items:
+        quantities[item.product_id] += item.quantity
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Baixa o estoque de cada produto com um UPDATE condicional (stock >= quantidade),
+    sem ler o valor antes. Deve rodar dentro de transaction.atomic(): se algum
+    produto não tiver estoque, OutOfStock é levantada e as baixas anteriores são
+    desfeitas pelo rollback. Os produtos são atualizados em ordem de id para que
+    pedidos concorrentes travem as linhas sempre na mesma ordem (sem deadlock).
+    """
+    for product_id in sorted(quantities):
+        quantity = quantities[product_id]
+        updated = Product.objects.filter(pk=product_id, stock__gte=quantity).update(
+            stock=F('stock') - quantity, updated_at=timezone.now()
+        )
+        if not updated:
+            raise OutOfStock(product_id)
+    _invalidate_catalog(quantities)
+
+
+def release_stock(quantities):
+    """Devolve ao estoque as quantidades de um pedido cancelado."""
+    for product_id in sorted(quantities):
+        Product.objects.filter(pk=product_id).update(
+            stock=F('stock') + quantities[product_id], updated_at=timezone.now()
+        )
+    _invalidate_catalog(quantities)
+
+
+def _invalidate_catalog(quantities):
+    """UPDATE não dispara sinais; invalida os produtos públicos dos produtores afetados."""
+    profile_ids = ProducerProfile.objects.filter(
+        user__products__pk__in=list(quantities)
+    ).values_list('pk', flat=True).distinct()
+    for profile_id in profile_ids:
+        # O estoque não aparece no diretório, só na página de produtos
+        invalidate_producer(profile_id, directory=False)
@@ -1,3 +1,995 @@
-from django.test import TestCase
+# backend/core/tests.py
 
-# Create your tests here.
+import asyncio
+import base64
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from core.instrumentation import QueryBudgetExceeded
+from core.throttling import TokenBucketThrottle
+from core.management.commands.check_query_budgets import budget_calls, strict_middleware
+from core.management.commands.check_query_plans import hot_queries, plan_sorts
+from core.analytics import rebuild_rollups
+from core.authentication import ClaimsTokenObtainPairSerializer
+from core.catalog_cache import DIRECTORY_SCOPE, PRODUCER_SCOPE, discard_cached_pages, get_version
+from core.events import NotificationBroker, Subscription
+from core import outbox, search
+from core.models import Order, OrderItem, OutboxEvent, ProducerNotification, ProducerProfile, ProducerSalesDaily, Product, ProductSalesDaily, Rating, normalize_phone
+from core.serializers import OrderSerializer
+from core.token_blacklist import (
+    GAP_TIMEOUT, REBUILD_SECONDS, BlacklistCache, BloomFilter, CachedBlacklistRefreshToken, blacklist_cache,
+)
+
+
+def create_producer(username='produtor', **profile):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='senha-teste')
+    profile.setdefault('name', username.title())
+    profile.setdefault('cpf_cnpj', f'cpf-{username}')
+    ProducerProfile.objects.create(user=user, **profile)
+    return user
+
+
+def create_order(producer, product, quantity=1, status='Pendente', phone='11999999999', **fields):
+    order = Order.objects.create(
+        producer=producer, client_name='Cliente', client_phone=phone,
+        status=status, total_price=product.price * quantity, **fields,
+    )
+    OrderItem.objects.create(
+        order=order, product=product, product_name=product.name, quantity=quantity,
+        unit_price=product.price, subtotal=product.price * quantity,
+    )
+    return order
+
+
+class QueryPlanTests(TestCase):
+    """As consultas principais da API devem usar os índices compostos, sem ordenação extra."""
+
+    def test_hot_queries_use_composite_indexes(self):
+        if connection.vendor == 'postgresql':
+            # Em tabelas vazias o Postgres prefere seq scan; força a avaliação dos índices
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for label, index_name, needs_order, queryset in hot_queries():
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertIn(index_name, plan)
+                if needs_order:
+                    self.assertFalse(plan_sorts(plan), f'ordenação feita fora do índice:\n{plan}')
+
+
+class OrderStatusTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Alface', category='Verduras', stock=5, price=Decimal('3.50'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def test_generic_patch_does_not_change_status(self):
+        order = create_order(self.producer, self.product, status='Entregue')
+        response = self.client.patch(f'/api/orders/{order.pk}/', {'status': 'Cancelado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'Entregue')
+
+    def test_update_status_follows_state_machine(self):
+        delivered = create_order(self.producer, self.product, status='Entregue')
+        cancelled = create_order(self.producer, self.product, status='Cancelado')
+        for order, target in ((delivered, 'Pendente'), (cancelled, 'Aceito')):
+            with self.subTest(f'{order.status} -> {target}'):
+                response = self.client.patch(f'/api/orders/{order.pk}/update_status/', {'status': target}, format='json')
+                self.assertEqual(response.status_code, 400)
+                order.refresh_from_db()
+                self.assertNotEqual(order.status, target)
+
+    def test_cancel_releases_stock(self):
+        order = create_order(self.producer, self.product, quantity=2, status='Aceito', stock_reserved=True)
+        response = self.client.patch(f'/api/orders/{order.pk}/update_status/', {'status': 'Cancelado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        order.refresh_from_db()
+        self.assertFalse(order.stock_reserved)
+
+    def test_cancel_without_reservation_keeps_stock(self):
+        # Pedidos anteriores à reserva de estoque nunca baixaram o estoque
+        single = create_order(self.producer, self.product, quantity=2)
+        bulk = create_order(self.producer, self.product, quantity=3)
+        response = self.client.patch(f'/api/orders/{single.pk}/update_status/', {'status': 'Cancelado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/orders/bulk_update_status/', {'ids': [bulk.pk], 'status': 'Cancelado'}, format='json')
+        self.assertEqual(response.data['updated'], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def test_bulk_same_status_is_noop(self):
+        accepted = create_order(self.producer, self.product, status='Aceito')
+        delivered = create_order(self.producer, self.product, status='Entregue')
+        response = self.client.post(
+            '/api/orders/bulk_update_status/', {'ids': [accepted.pk, delivered.pk], 'status': 'Aceito'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(
+            [result['result'] for result in response.data['results']], ['unchanged', 'invalid_transition']
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_bulk_cancel_releases_only_reserved_orders(self):
+        reserved = create_order(self.producer, self.product, quantity=2, stock_reserved=True)
+        legacy = create_order(self.producer, self.product, quantity=3)
+        response = self.client.post(
+            '/api/orders/bulk_update_status/', {'ids': [reserved.pk, legacy.pk], 'status': 'Cancelado'}, format='json'
+        )
+        self.assertEqual(response.data['updated'], 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        self.assertFalse(Order.objects.filter(stock_reserved=True).exists())
+
+
+class OrderListQueryCountTests(TestCase):
+    """A listagem de pedidos faz o mesmo número de consultas com qualquer quantidade de pedidos."""
+
+    def setUp(self):
+        self.producer = create_producer()
+        self.products = [
+            Product.objects.create(owner=self.producer, name=f'Produto {i}', category='Frutas', stock=100, price=Decimal('2.00'))
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def add_orders(self, total):
+        for i in range(total):
+            order = create_order(self.producer, self.products[i % 3], status='Entregue')
+            OrderItem.objects.create(
+                order=order, product=self.products[(i + 1) % 3], product_name='Extra',
+                quantity=1, unit_price=Decimal('2.00'), subtotal=Decimal('2.00'),
+            )
+            Rating.objects.create(
+                producer=self.producer, order=order, client_name='Cliente',
+                client_phone=order.client_phone, score=i % 5 + 1,
+            )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        return len(response.data['results']), len(captured.captured_queries)
+
+    def test_order_list_query_count_is_constant(self):
+        self.add_orders(2)
+        few_results, few_queries = self.count_list_queries()
+        self.add_orders(15)
+        many_results, many_queries = self.count_list_queries()
+        self.assertEqual((few_results, many_results), (2, 17))
+        self.assertEqual(few_queries, many_queries)
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.products = [
+            Product.objects.create(owner=self.producer, name=f'Produto {i}', category='Frutas', stock=1, price=Decimal('2.00'))
+            for i in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def test_deleted_row_invalidates_validators(self):
+        first = self.client.get('/api/products/')
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.products[0].delete()
+        for headers in ({'HTTP_IF_NONE_MATCH': first['ETag']}, {'HTTP_IF_MODIFIED_SINCE': first['Last-Modified']}):
+            with self.subTest(headers=list(headers)):
+                response = self.client.get('/api/products/', **headers)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), 1)
+
+
+class ProducerLocationTests(TestCase):
+    def test_unknown_city_clears_coordinates(self):
+        profile = create_producer(city='Campinas').producer_profile
+        self.assertIsNotNone(profile.latitude)
+
+        profile.city = 'Cidade Inexistente'
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.city_key, 'cidade inexistente')
+        self.assertEqual((profile.latitude, profile.longitude), (None, None))
+
+    def test_nearby_rejects_non_finite_numbers(self):
+        for query in ('limit=nan', 'limit=2.5', 'radius_km=nan', 'radius_km=inf'):
+            with self.subTest(query):
+                response = self.client.get(f'/api/producers/nearby/?city=Campinas&{query}')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/producers/nearby/?city=Campinas&limit=5&radius_km=10.5').status_code, 200)
+
+
+class AsyncCursorTests(TestCase):
+    def setUp(self):
+        self.profile = create_producer().producer_profile
+        for i in range(3):
+            Product.objects.create(owner=self.profile.user, name=f'Produto {i}', category='Frutas', stock=1, price=Decimal('1.00'))
+
+    def cursor(self, value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+    def test_malformed_cursors_return_400(self):
+        producers = '/api/async/producers/'
+        products = f'/api/async/producers/{self.profile.pk}/products/'
+        cases = [(url, value) for url in (producers, products) for value in ('abc', [1], 5, [None, 1], ['x', '1'], None)]
+        cases += [(products, ['nope', 1]), (products, [3, 1]), (producers, 'não é base64')]
+        for url, value in cases:
+            with self.subTest(url=url, cursor=value):
+                cursor = value if value == 'não é base64' else self.cursor(value)
+                self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 400)
+
+    def test_next_cursor_round_trips(self):
+        url = f'/api/async/producers/{self.profile.pk}/products/'
+        first = self.client.get(url, {'page_size': 2}).json()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(first['results']) + len(second['results']), 3)
+        self.assertIsNone(second['next'])
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Alface', category='Verduras', stock=10, price=Decimal('3.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def rollups(self):
+        return (
+            list(ProducerSalesDaily.objects.values_list('delivered_orders', 'revenue', 'cancelled_orders')),
+            list(ProductSalesDaily.objects.values_list('delivered_orders', 'quantity', 'revenue', 'cancelled_orders')),
+        )
+
+    def test_incremental_rollups_match_rebuild_with_repeated_lines(self):
+        delivered = create_order(self.producer, self.product, quantity=1)
+        cancelled = create_order(self.producer, self.product, quantity=2)
+        for order in (delivered, cancelled):
+            OrderItem.objects.create(
+                order=order, product=self.product, product_name=self.product.name,
+                quantity=1, unit_price=self.product.price, subtotal=self.product.price,
+            )
+        self.client.patch(f'/api/orders/{delivered.pk}/update_status/', {'status': 'Entregue'}, format='json')
+        self.client.post('/api/orders/bulk_update_status/', {'ids': [cancelled.pk], 'status': 'Cancelado'}, format='json')
+
+        incremental = self.rollups()
+        self.assertEqual(incremental[1][0][0], 1)
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), incremental)
+
+
+class QueryBudgetTests(TestCase):
+    """Cada rota de leitura fica dentro do REQUEST_QUERY_BUDGETS (middleware em modo estrito)."""
+
+    def setUp(self):
+        self.profile = create_producer(city='Campinas').producer_profile
+        producer = self.profile.user
+        products = [
+            Product.objects.create(owner=producer, name=f'Produto orgânico {i}', category=f'Categoria {i % 2}', stock=50, price=Decimal('2.00'))
+            for i in range(4)
+        ]
+        for i in range(6):
+            order = create_order(producer, products[i % 4], status='Entregue')
+            Rating.objects.create(producer=producer, order=order, client_name='Cliente', client_phone=order.client_phone, score=4, comment='Bom')
+        create_producer('outro', city='Campinas')
+
+    def test_read_endpoints_within_budget(self):
+        anonymous = APIClient()
+        producer = APIClient()
+        producer.force_login(self.profile.user)
+        with override_settings(MIDDLEWARE=strict_middleware(), REQUEST_METRICS_STRICT=True):
+            for authenticated, url in budget_calls(self.profile):
+                with self.subTest(url):
+                    discard_cached_pages([self.profile.pk])
+                    try:
+                        response = (producer if authenticated else anonymous).get(url)
+                    except QueryBudgetExceeded as error:
+                        self.fail(str(error))
+                    self.assertEqual(response.status_code, 200)
+
+    def test_command_keeps_shared_cache(self):
+        cache.set('sessao-de-outro-usuario', 'valor')
+        output = io.StringIO()
+        call_command('check_query_budgets', stdout=output)
+        self.assertIn('Todas as rotas dentro do orçamento.', output.getvalue())
+        self.assertEqual(cache.get('sessao-de-outro-usuario'), 'valor')
+
+
+class BenchApiTests(TestCase):
+    def run_bench(self, *args):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command(
+                'bench_api', '--producers=2', '--products=3', '--orders=6', '--ratings=2', '--requests=3',
+                f'--output={path}', *args, stdout=io.StringIO(),
+            )
+            with open(path, encoding='utf-8') as handle:
+                return json.load(handle)
+
+    def test_report_and_cleanup(self):
+        cache.set('sessao-de-outro-usuario', 'valor')
+        for args in ((), ('--no-cache',)):
+            with self.subTest(args=args):
+                report = self.run_bench(*args)
+                self.assertEqual(report['meta']['cache'], not args)
+                self.assertEqual(
+                    set(report['endpoints']),
+                    {'directory', 'producer_products', 'order_create', 'order_status_update', 'rating_create'},
+                )
+                for name, result in report['endpoints'].items():
+                    self.assertEqual((name, result['requests'], result['errors']), (name, 3, 0))
+                self.assertFalse(User.objects.filter(username__startswith='bench-').exists())
+        self.assertEqual(cache.get('sessao-de-outro-usuario'), 'valor')
+
+
+class NotificationBrokerTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+
+    async def test_late_lower_id_is_delivered(self):
+        broker = NotificationBroker()
+        broker.last_id = 10
+        subscription = Subscription(self.producer.pk)
+        broker.subscribers[self.producer.pk].add(subscription)
+
+        # Dois workers: o id 12 é gravado antes do 11
+        await ProducerNotification.objects.acreate(id=12, producer=self.producer, kind='order.created')
+        await broker._poll_once()
+        await ProducerNotification.objects.acreate(id=11, producer=self.producer, kind='order.created')
+        await broker._poll_once()
+
+        delivered = [subscription.queue.get_nowait().id for _ in range(subscription.queue.qsize())]
+        self.assertEqual(delivered, [12, 11])
+        self.assertEqual(broker.gaps, {})
+
+    async def test_poll_survives_errors(self):
+        broker = NotificationBroker(interval=0.01)
+        calls = []
+
+        async def flaky_poll():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('banco indisponível')
+            if len(calls) >= 3:
+                broker.subscribers.clear()
+            return 0
+
+        broker._poll_once = flaky_poll
+        broker.subscribers[self.producer.pk].add(object())
+        with self.assertLogs('core.events', level='ERROR'):
+            await asyncio.wait_for(broker._poll(), 1)
+        self.assertEqual(len(calls), 3)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = create_producer()
+        self.client = APIClient()
+        access = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_user_details_returns_real_identity(self):
+        response = self.client.get('/api/auth/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], self.user.username)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_other_reads_still_skip_user_lookup(self):
+        # Só a consulta das notificações; o usuário vem das claims
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(TOKEN_BLACKLIST_SYNC_SECONDS=0)
+class TokenBlacklistCacheTests(TestCase):
+    def setUp(self):
+        self.user = create_producer()
+        self.cache = BlacklistCache()
+        blacklist_cache.reset()
+
+    def blacklist(self, jti, pk=None, expires_in=timedelta(days=1)):
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, expires_at=timezone.now() + expires_in,
+        )
+        return BlacklistedToken.objects.create(pk=pk, token=token)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000)
+        values = [f'jti-{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f'outro-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_revoked_refresh_token_is_rejected(self):
+        refresh = CachedBlacklistRefreshToken.for_user(self.user)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 200)
+        refresh.blacklist()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_out_of_order_commit_is_picked_up(self):
+        # Outro processo grava o id 12 antes do 11: o 11 fica como lacuna até aparecer
+        self.blacklist('primeiro', pk=10)
+        self.assertTrue(self.cache.might_contain('primeiro'))
+        self.blacklist('terceiro', pk=12)
+        self.assertTrue(self.cache.might_contain('terceiro'))
+        self.assertEqual(self.cache.last_id, 12)
+        self.assertIn(11, self.cache.gaps)
+
+        self.blacklist('atrasado', pk=11)
+        self.assertTrue(self.cache.might_contain('atrasado'))
+        self.assertNotIn(11, self.cache.gaps)
+
+    def test_gaps_expire(self):
+        self.blacklist('primeiro', pk=1)
+        self.blacklist('terceiro', pk=3)
+        self.cache.might_contain('primeiro')
+        self.cache.gaps = {gap: seen - GAP_TIMEOUT for gap, seen in self.cache.gaps.items()}
+        self.cache.might_contain('primeiro')
+        self.assertEqual(self.cache.gaps, {})
+
+    def test_rebuild_drops_expired_tokens(self):
+        self.blacklist('expirado', expires_in=timedelta(seconds=-1))
+        self.blacklist('valido')
+        self.cache.might_contain('valido')
+        self.cache.built_at -= REBUILD_SECONDS + 1
+        self.assertTrue(self.cache.might_contain('valido'))
+        self.assertFalse(self.cache.might_contain('expirado'))
+
+
+@override_settings(ORDER_LOOKUP_RATE=(1, 3), ORDER_LOOKUP_GLOBAL_RATE=(1, 5))
+class OrderLookupThrottleTests(TestCase):
+    def setUp(self):
+        TokenBucketThrottle._instances.clear()
+        self.client = APIClient()
+
+    def lookup(self, ip):
+        return self.client.get('/api/orders/?client_phone=11999999999', REMOTE_ADDR=ip).status_code
+
+    def test_rejected_requests_do_not_drain_global_bucket(self):
+        codes = [self.lookup('10.0.0.1') for _ in range(20)]
+        self.assertEqual(codes.count(200), 3)
+        self.assertEqual(codes.count(429), 17)
+        # O scraper gastou só 3 das 5 fichas globais; outro cliente ainda consulta
+        self.assertEqual([self.lookup('10.0.0.2') for _ in range(2)], [200, 200])
+        self.assertEqual(self.lookup('10.0.0.3'), 429)
+
+
+class RatingCreateTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Alface', category='Verduras', stock=10, price=Decimal('3.00'))
+        self.order = create_order(self.producer, self.product, status='Entregue', phone='(11) 99999-9999')
+        self.client = APIClient()
+
+    def rate(self, order=None, phone='+55 11 99999 9999', score=5):
+        return self.client.post('/api/ratings/', {
+            'order_id': (order or self.order).pk, 'client_name': 'Cliente', 'client_phone': phone, 'score': score,
+        }, format='json')
+
+    def test_creates_with_one_locked_order_read(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.rate()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['producer_name'], 'Produtor')
+        order_reads = [q['sql'] for q in captured.captured_queries if q['sql'].startswith('SELECT') and 'FROM "core_order"' in q['sql']]
+        self.assertEqual(len(order_reads), 1)
+        self.assertIn('"core_producerprofile"', order_reads[0])
+        # A repetição é barrada pela restrição única, sem consulta prévia de avaliações
+        self.assertFalse(any('FROM "core_rating"' in q['sql'] for q in captured.captured_queries))
+
+    def test_duplicate_rating_is_rejected(self):
+        self.assertEqual(self.rate().status_code, 201)
+        response = self.rate(score=1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('order_id', response.data)
+        self.assertEqual(Rating.objects.get().score, 5)
+
+    def test_phone_must_match_order(self):
+        response = self.rate(phone='11988888888')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('client_phone', response.data)
+        self.assertFalse(Rating.objects.exists())
+
+    def test_only_delivered_orders(self):
+        for status in ('Pendente', 'Aceito', 'Cancelado'):
+            with self.subTest(status):
+                order = create_order(self.producer, self.product, status=status, phone='11999999999')
+                response = self.rate(order)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('order_id', response.data)
+        self.assertFalse(Rating.objects.exists())
+
+
+class PhoneKeyTests(TestCase):
+    def test_key_fits_longest_normalized_phone(self):
+        longest = max(normalize_phone('9' * 20), normalize_phone('+' + '9' * 19), key=len)
+        self.assertLessEqual(len(longest), Order._meta.get_field('client_phone_key').max_length)
+
+    def test_equivalent_formats_share_key(self):
+        producer = create_producer()
+        product = Product.objects.create(owner=producer, name='Alface', category='Verduras', stock=10, price=Decimal('3.00'))
+        keys = {
+            create_order(producer, product, phone=phone).client_phone_key
+            for phone in ('(11) 98765-4321', '11987654321', '+55 11 98765 4321', '011 98765-4321')
+        }
+        self.assertEqual(keys, {'+5511987654321'})
+
+
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.producer = create_producer()
+        self.profile = self.producer.producer_profile
+        product = Product.objects.create(owner=self.producer, name='Alface', category='Verduras', stock=10, price=Decimal('3.00'))
+        for i, (score, comment) in enumerate(((5, 'Ótimo'), (4, ''), (5, 'Muito bom'), (2, 'Atrasou'), (5, ''))):
+            order = create_order(self.producer, product, status='Entregue')
+            Rating.objects.create(
+                producer=self.producer, order=order, client_name=f'Cliente {i}',
+                client_phone=order.client_phone, score=score, comment=comment,
+            )
+        self.url = f'/api/producers/{self.profile.pk}/ratings/summary/'
+
+    def test_summary_from_aggregates(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['average'], 4.2)
+        self.assertEqual(response.data['histogram'], {'1': 0, '2': 1, '3': 0, '4': 1, '5': 3})
+        # Só avaliações com comentário, mais recentes primeiro e sem o telefone do cliente
+        reviews = response.data['recent_reviews']
+        self.assertEqual([review['comment'] for review in reviews], ['Atrasou', 'Muito bom', 'Ótimo'])
+        self.assertNotIn('client_phone', reviews[0])
+
+    def test_recent_limit(self):
+        for value, expected in (('1', 1), ('0', 0), ('abc', 3), ('999', 3)):
+            with self.subTest(recent=value):
+                response = self.client.get(self.url, {'recent': value})
+                self.assertEqual(len(response.data['recent_reviews']), expected)
+
+    def test_query_count_does_not_depend_on_ratings(self):
+        # Perfil (agregados) e comentários recentes (índice parcial)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_unknown_producer(self):
+        self.assertEqual(self.client.get('/api/producers/999999/ratings/summary/').status_code, 404)
+
+
+class RatingAggregateTests(TestCase):
+    """Os agregados de avaliação do perfil acompanham criação, edição e exclusão."""
+
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Alface', category='Verduras', stock=10, price=Decimal('3.00'))
+
+    def rate(self, score):
+        order = create_order(self.producer, self.product, status='Entregue')
+        return Rating.objects.create(producer=self.producer, order=order, client_name='Cliente', client_phone=order.client_phone, score=score)
+
+    def aggregates(self):
+        profile = ProducerProfile.objects.get(user=self.producer)
+        return profile.rating_count, profile.rating_sum, profile.rating_average
+
+    def test_create_update_delete_keep_totals(self):
+        first = self.rate(5)
+        second = self.rate(2)
+        self.assertEqual(self.aggregates(), (2, 7, 3.5))
+
+        second.score = 4
+        second.save()
+        self.assertEqual(self.aggregates(), (2, 9, 4.5))
+
+        first.delete()
+        self.assertEqual(self.aggregates(), (1, 4, 4.0))
+        second.delete()
+        self.assertEqual(self.aggregates(), (0, 0, 0))
+
+    def test_aggregates_match_recalculation(self):
+        for score in (1, 3, 3, 5):
+            self.rate(score)
+        profile = ProducerProfile.objects.get(user=self.producer)
+        maintained = (profile.rating_count, profile.rating_sum, profile.rating_average)
+        profile.refresh_rating_aggregates()
+        self.assertEqual(maintained, (profile.rating_count, profile.rating_sum, profile.rating_average))
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        for i in range(7):
+            Product.objects.create(owner=self.producer, name=f'Produto {i}', category='Frutas', stock=1, price=Decimal('1.00'))
+        # Empates em created_at: o desempate por id mantém a ordem estável
+        Product.objects.filter(owner=self.producer).update(created_at=Product.objects.first().created_at)
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen = []
+        url = '/api/products/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen += [product['id'] for product in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(Product.objects.values_list('id', flat=True), reverse=True))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/products/?cursor=invalido')
+        self.assertEqual(response.status_code, 404)
+
+
+class OrderCreateTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.products = [
+            Product.objects.create(owner=self.producer, name=f'Produto {i}', category='Frutas', stock=50, price=Decimal('2.50'))
+            for i in range(10)
+        ]
+        self.client = APIClient()
+
+    def payload(self, products, quantity=2):
+        return {
+            'producer': self.producer.pk, 'client_name': 'Cliente', 'client_phone': '11999999999',
+            'items': [{'product': product.pk, 'quantity': quantity} for product in products],
+        }
+
+    def test_valid_order_snapshots_prices(self):
+        response = self.client.post('/api/orders/', self.payload(self.products[:3]), format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.total_price, Decimal('15.00'))
+        self.assertEqual(order.status, 'Pendente')
+        self.assertEqual(
+            sorted(order.items.values_list('product_name', 'unit_price', 'subtotal')),
+            [(f'Produto {i}', Decimal('2.50'), Decimal('5.00')) for i in range(3)],
+        )
+
+    def test_invalid_item_rejects_whole_order(self):
+        self.products[1].status = 'Inativo'
+        self.products[1].save()
+        other = Product.objects.create(owner=create_producer('outro'), name='Alheio', category='Frutas', stock=5, price=Decimal('1.00'))
+        for broken in ([self.products[0], self.products[1]], [self.products[0], other]):
+            with self.subTest(products=[product.name for product in broken]):
+                response = self.client.post('/api/orders/', self.payload(broken), format='json')
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock, 50)
+
+    def test_query_count_does_not_grow_with_items(self):
+        # Só a baixa de estoque é por produto (UPDATE condicional, em ordem de id);
+        # produtos, itens e a resposta usam um número fixo de consultas
+        counts = []
+        for products in (self.products[:2], self.products):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/api/orders/', self.payload(products), format='json')
+            self.assertEqual(response.status_code, 201)
+            stock_updates = [q for q in captured.captured_queries if q['sql'].startswith('UPDATE "core_product"')]
+            self.assertEqual(len(stock_updates), len(products))
+            counts.append(len(captured.captured_queries) - len(stock_updates))
+        self.assertEqual(counts[0], counts[1])
+
+
+class StockReservationTests(TestCase):
+    """O pedido baixa o estoque com um UPDATE condicional na mesma transação em que é criado."""
+
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Ovos', category='Ovos', stock=3, price=Decimal('12.00'))
+        self.client = APIClient()
+
+    def payload(self, quantity):
+        return {
+            'producer': self.producer.pk, 'client_name': 'Cliente', 'client_phone': '11999999999',
+            'items': [{'product': self.product.pk, 'quantity': quantity}],
+        }
+
+    def test_order_reserves_stock(self):
+        response = self.client.post('/api/orders/', self.payload(2), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertTrue(Order.objects.get(pk=response.data['id']).stock_reserved)
+
+    def test_short_stock_rejects_order(self):
+        response = self.client.post('/api/orders/', self.payload(4), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Estoque insuficiente', response.data['items'][0])
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_concurrent_orders_for_last_unit(self):
+        # Os dois pedidos são validados com o mesmo estoque lido; só o primeiro a gravar leva a última unidade
+        self.product.stock = 1
+        self.product.save()
+        first, second = OrderSerializer(data=self.payload(1)), OrderSerializer(data=self.payload(1))
+        self.assertTrue(first.is_valid())
+        self.assertTrue(second.is_valid())
+        first.save()
+        with self.assertRaises(ValidationError):
+            second.save()
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+
+class CatalogCacheTests(TestCase):
+    """As páginas públicas em cache trocam de versão a cada escrita de produto, perfil ou usuário."""
+
+    def setUp(self):
+        cache.clear()
+        self.producer = create_producer()
+        self.profile = self.producer.producer_profile
+        self.product = Product.objects.create(owner=self.producer, name='Mel', category='Mel', stock=5, price=Decimal('20.00'))
+        self.client = APIClient()
+
+    def versions(self):
+        return get_version(DIRECTORY_SCOPE), get_version(PRODUCER_SCOPE, self.profile.pk)
+
+    def test_writes_bump_versions(self):
+        # O diretório também muda com produtos (lista as categorias de cada produtor)
+        for label, write in (
+            ('produto', self.product.save),
+            ('perfil', self.profile.save),
+            ('usuário', self.producer.save),
+        ):
+            with self.subTest(label):
+                directory_version, producer_version = self.versions()
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                new_directory, new_producer = self.versions()
+                self.assertNotEqual(new_directory, directory_version)
+                self.assertNotEqual(new_producer, producer_version)
+
+    def test_login_does_not_invalidate(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producer.save(update_fields=['last_login'])
+        self.assertEqual(self.versions(), before)
+
+    def test_stale_entries_not_served(self):
+        detail = f'/api/producers/{self.profile.pk}/'
+        products = f'/api/producers/{self.profile.pk}/products/'
+        self.assertEqual(self.client.get(detail).data['email'], 'produtor@example.com')
+        self.assertEqual(self.client.get(products).data['results'][0]['price'], '20.00')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producer.email = 'novo@example.com'
+            self.producer.save()
+            self.product.price = Decimal('25.00')
+            self.product.save()
+
+        self.assertEqual(self.client.get(detail).data['email'], 'novo@example.com')
+        self.assertEqual(self.client.get(products).data['results'][0]['price'], '25.00')
+
+
+class SearchTests(TestCase):
+    """Busca sem Postgres: índice invertido em memória restrito aos produtos ativos."""
+
+    def setUp(self):
+        cache.clear()
+        search._indexes.clear()
+        self.producer = create_producer()
+        self.client = APIClient()
+
+    def add_product(self, name, category='Legumes', status='Ativo'):
+        return Product.objects.create(
+            owner=self.producer, name=name, category=category, status=status, stock=5, price=Decimal('4.00'),
+        )
+
+    def test_ranking_prefers_exact_and_short_matches(self):
+        # Criados na ordem inversa da esperada, para o desempate por id não mascarar o rank
+        prefix = self.add_product('Tomateiro')
+        longer = self.add_product('Tomate cereja italiano orgânico')
+        exact = self.add_product('Tomate')
+        response = self.client.get('/api/search/', {'q': 'tomates'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [exact.pk, longer.pk, prefix.pk])
+        ranks = [row['rank'] for row in response.data['results']]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+
+    def test_only_active_products(self):
+        active = self.add_product('Abóbora cabotiá')
+        self.add_product('Abóbora moranga', status='Inativo')
+        response = self.client.get('/api/search/', {'q': 'abobora'})
+        self.assertEqual([row['id'] for row in response.data['results']], [active.pk])
+        self.assertNotIn('search_document', self.client.get(f'/api/producers/{self.producer.producer_profile.pk}/products/').data['results'][0])
+
+    def test_limit_applies_after_active_filter(self):
+        # Os inativos nem entram no índice, então não ocupam vagas do limite
+        inactive = {self.add_product(f'Batata {i}', status='Inativo').pk for i in range(3)}
+        active = self.add_product('Batata doce')
+        index = search._fallback_index(Product.objects.filter(status='Ativo'))
+        hits = index.search(['batata'], limit=1)
+        self.assertEqual(list(hits), [active.pk])
+        self.assertFalse(inactive & set(index.lengths))
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        product = Product.objects.create(owner=self.producer, name='Queijo', category='Laticínios', stock=10, price=Decimal('30.00'))
+        self.orders = [create_order(self.producer, product, quantity=quantity) for quantity in (1, 2)]
+        create_order(create_producer('outro'), product)
+        self.expected = [
+            'order_id,created_at,status,client_name,client_phone,client_email,total_price,'
+            'product_id,product_name,quantity,unit_price,subtotal',
+        ] + [
+            f'{order.pk},{order.created_at.isoformat()},Pendente,Cliente,11999999999,,{order.total_price},'
+            f'{product.pk},Queijo,{quantity},30.00,{order.total_price}'
+            for order, quantity in zip(self.orders, (1, 2))
+        ]
+
+    def test_csv_streams_under_wsgi(self):
+        self.client.force_login(self.producer)
+        response = self.client.get('/api/orders/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), self.expected)
+
+    async def test_csv_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.producer)
+        response = await self.async_client.get('/api/orders/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content.decode().splitlines(), self.expected)
+
+
+class ProductBulkUpsertTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.banana = Product.objects.create(owner=self.producer, name='Banana', category='Frutas', stock=10, price=Decimal('5.00'))
+        self.maca = Product.objects.create(owner=self.producer, name='Maçã', category='Frutas', stock=20, price=Decimal('8.00'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.producer)
+
+    def upsert(self, rows, **params):
+        query = '?skip_invalid=true' if params.get('skip_invalid') else ''
+        return self.client.post(f'/api/products/bulk_upsert/{query}', rows, format='json')
+
+    def test_insert_and_update(self):
+        response = self.upsert([
+            {'name': 'Uva', 'category': 'Frutas', 'stock': 3, 'price': '12.00'},
+            {'name': 'Banana', 'price': '6.00'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (1, 1))
+        self.banana.refresh_from_db()
+        self.assertEqual(self.banana.price, Decimal('6.00'))
+        self.assertEqual(Product.objects.get(name='Uva').search_document, 'uva fruta')
+
+    def test_partial_rows_write_only_their_own_columns(self):
+        # Outra escrita muda o estoque depois da leitura; a linha que só traz o preço não pode desfazê-la
+        with CaptureQueriesContext(connection) as captured:
+            response = self.upsert([
+                {'id': self.banana.pk, 'price': '7.00'},
+                {'id': self.maca.pk, 'stock': 25},
+            ])
+        self.assertEqual(response.data['updated'], 2)
+        bulk_updates = [
+            q['sql'] for q in captured.captured_queries
+            if q['sql'].startswith('UPDATE "core_product"') and 'CASE' in q['sql']
+        ]
+        self.assertEqual(len(bulk_updates), 2)
+        self.assertTrue(all(('"price" =' in sql) != ('"stock" =' in sql) for sql in bulk_updates))
+        self.banana.refresh_from_db()
+        self.maca.refresh_from_db()
+        self.assertEqual((self.banana.price, self.banana.stock), (Decimal('7.00'), 10))
+        self.assertEqual((self.maca.price, self.maca.stock), (Decimal('8.00'), 25))
+
+    def test_existing_rows_are_read_inside_the_write_transaction(self):
+        # SQLite ignora FOR UPDATE; aqui vale que a leitura acontece dentro da transação da escrita
+        with CaptureQueriesContext(connection) as captured:
+            self.upsert([{'id': self.banana.pk, 'stock': 1}])
+        sql = [q['sql'] for q in captured.captured_queries]
+        transaction_start = next(i for i, statement in enumerate(sql) if statement.startswith('SAVEPOINT'))
+        first_read = next(i for i, statement in enumerate(sql) if 'FROM "core_product"' in statement)
+        self.assertLess(transaction_start, first_read)
+
+    def test_bad_input_rejects_batch(self):
+        for row in ({'id': '1.5', 'price': '1.00'}, {'id': '²', 'price': '1.00'}, {'id': 'abc'},
+                    {'name': 'Kiwi', 'category': 'Frutas', 'stock': 1, 'price': '-1'}, 'linha'):
+            with self.subTest(row=row):
+                response = self.upsert([{'name': 'Pera', 'category': 'Frutas', 'stock': 1, 'price': '4.00'}, row])
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertFalse(Product.objects.filter(name='Pera').exists())
+
+    def test_skip_invalid_keeps_valid_rows(self):
+        response = self.upsert([{'id': 'x1'}, {'id': self.banana.pk, 'stock': 4}], skip_invalid=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['updated'], len(response.data['errors'])), (1, 1))
+        self.banana.refresh_from_db()
+        self.assertEqual(self.banana.stock, 4)
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.producer = create_producer()
+        self.product = Product.objects.create(owner=self.producer, name='Café', category='Grãos', stock=5, price=Decimal('40.00'))
+
+    def enqueue_order(self, producer):
+        order = create_order(producer, self.product)
+        return outbox.enqueue_order_created(order, order.items.all())
+
+    def test_delivers_and_is_idempotent(self):
+        event = self.enqueue_order(self.producer)
+        self.assertEqual(outbox.process_batch(), 1)
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        notification = ProducerNotification.objects.get()
+        self.assertEqual((notification.producer, notification.event, notification.kind), (self.producer, event, outbox.ORDER_CREATED))
+        # Reentrega (ex.: o worker caiu antes de marcar o evento) não duplica a notificação
+        outbox.notify_producer(event)
+        self.assertEqual(ProducerNotification.objects.count(), 1)
+        self.assertEqual(outbox.process_batch(), 0)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        event = outbox.enqueue('teste.falha', {})
+
+        def fail(event):
+            raise RuntimeError('indisponível')
+
+        with mock.patch.dict(outbox.HANDLERS, {'teste.falha': fail}), self.assertLogs('core.outbox', 'ERROR'):
+            self.assertEqual(outbox.process_batch(), 1)
+            event.refresh_from_db()
+            self.assertIsNone(event.processed_at)
+            self.assertEqual(event.attempts, 1)
+            self.assertIn('indisponível', event.last_error)
+            self.assertGreater(event.available_at, timezone.now())
+            # Reagendado: não volta no mesmo lote nem antes da hora
+            self.assertEqual(outbox.process_batch(), 0)
+
+            OutboxEvent.objects.filter(pk=event.pk).update(attempts=outbox.MAX_ATTEMPTS - 1, available_at=timezone.now())
+            outbox.process_batch()
+            event.refresh_from_db()
+            self.assertIsNotNone(event.processed_at)
+            self.assertEqual(event.attempts, outbox.MAX_ATTEMPTS)
+
+    def test_orphaned_producer_is_skipped(self):
+        gone = create_producer('removido')
+        orphan = self.enqueue_order(gone)
+        delivered = self.enqueue_order(self.producer)
+        Order.objects.filter(producer=gone).delete()
+        gone.delete()
+
+        with self.assertLogs('core.outbox', 'WARNING'):
+            self.assertEqual(outbox.process_batch(), 2)
+        orphan.refresh_from_db()
+        delivered.refresh_from_db()
+        self.assertIsNotNone(orphan.processed_at)
+        self.assertEqual(orphan.attempts, 1)
+        self.assertIn('não existe mais', orphan.last_error)
+        self.assertIsNotNone(delivered.processed_at)
+        self.assertEqual(list(ProducerNotification.objects.values_list('producer_id', flat=True)), [self.producer.pk])
@@ -0,0 +1,89 @@
+# backend/core/throttling.py
+
+"""
+Limite de requisições por token bucket, em memória do processo.
+Cada chave (IP do cliente, ou o processo inteiro) tem um balde que se enche
+continuamente até 'burst' fichas; cada requisição gasta uma. Sem cache
+compartilhado, o limite é por worker: N workers aceitam até N vezes a taxa.
+"""
+
+import threading
+import time
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+# Acima disso, os baldes já cheios (clientes parados) são descartados
+MAX_BUCKETS = 10000
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate  # fichas por segundo
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def consume(self, key):
+        """Gasta uma ficha da chave; devolve 0 se conseguiu ou os segundos até a próxima ficha."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                if key not in self.buckets and len(self.buckets) >= MAX_BUCKETS:
+                    self._prune(now)
+                self.buckets[key] = (tokens - 1, now)
+                return 0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+    def _prune(self, now):
+        self.buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self.buckets.items()
+            if tokens + (now - updated) * self.rate < self.burst
+        }
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle do DRF sobre TokenBuckets. Cada item de 'buckets' é (configuração
+    com (requisições por minuto, rajada), valor padrão, escopo): 'ip' limita cada
+    cliente e 'global' limita todas as requisições do processo. Os baldes são
+    consultados em ordem e o primeiro que recusar encerra a checagem, para que
+    requisições já recusadas por IP não gastem as fichas do balde global.
+    """
+    buckets = ()
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def get_bucket(self, rate_setting, default_rate):
+        per_minute, burst = getattr(settings, rate_setting, default_rate)
+        config = (rate_setting, per_minute, burst)
+        with self._instances_lock:
+            bucket = self._instances.get(config)
+            if bucket is None:
+                bucket = self._instances[config] = TokenBucket(per_minute / 60, burst)
+        return bucket
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        for rate_setting, default_rate, scope in self.buckets:
+            key = self.get_ident(request) if scope == 'ip' else scope
+            self.wait_time = self.get_bucket(rate_setting, default_rate).consume(key)
+            if self.wait_time:
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class OrderLookupThrottle(TokenBucketThrottle):
+    """
+    Consulta anônima de pedidos por telefone: limite por IP e, para as requisições
+    aceitas por IP, um teto do processo contra varredura distribuída.
+    """
+    buckets = (
+        ('ORDER_LOOKUP_RATE', (30, 10), 'ip'),
+        ('ORDER_LOOKUP_GLOBAL_RATE', (600, 100), 'global'),
+    )
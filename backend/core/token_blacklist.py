@@ -0,0 +1,172 @@
+# backend/core/token_blacklist.py
+
+"""
+Verificação da blacklist de refresh tokens com um filtro de Bloom em memória
+na frente das tabelas do rest_framework_simplejwt.token_blacklist.
+Se o filtro diz que o jti não está na blacklist, não há consulta; se diz que
+talvez esteja, confirma no banco (falso positivo ~1%). Tokens colocados na
+blacklist por este processo entram no filtro na hora; os de outros processos,
+na próxima sincronização (TOKEN_BLACKLIST_SYNC_SECONDS).
+Como em core.events, um id menor pode ser gravado depois de um maior: os ids
+pulados ficam como lacunas e são consultados de novo por GAP_TIMEOUT segundos.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+FALSE_POSITIVE_RATE = 0.01
+# Reconstrução completa de tempos em tempos, para descartar tokens já expirados
+REBUILD_SECONDS = 3600
+# Tempo que um id pulado continua sendo procurado, e quantos ids pulados guardar no máximo
+GAP_TIMEOUT = 30.0
+MAX_GAPS = 1000
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Duas funções de hash combinadas (Kirsch-Mitzenmacher) geram as k posições
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistCache:
+    """Filtro do processo, sincronizado com BlacklistedToken de forma incremental (por id)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        # id pulado -> instante (monotonic) em que a lacuna foi vista
+        self.gaps = {}
+        self.synced_at = 0.0
+        self.built_at = 0.0
+
+    def _capacity(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 100_000)
+
+    def _track(self, rows, now):
+        """Adiciona os jti ao filtro e registra os ids pulados até aqui."""
+        for pk, jti in rows:
+            self.bloom.add(jti)
+            if pk > self.last_id:
+                skipped = range(max(self.last_id + 1, pk - MAX_GAPS), pk)
+                self.gaps.update(dict.fromkeys(skipped, now))
+                self.last_id = pk
+            else:
+                self.gaps.pop(pk, None)
+        if len(self.gaps) > MAX_GAPS:
+            self.gaps = dict(sorted(self.gaps.items())[-MAX_GAPS:])
+
+    def _rebuild(self, now):
+        rows = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            .order_by('id').values_list('id', 'token__jti')
+        )
+        self.bloom = BloomFilter(max(self._capacity(), len(rows) * 2))
+        # Continua do último id visto: o que ainda não foi gravado abaixo dele vira lacuna
+        self._track(rows, now)
+        self.built_at = now
+
+    def _sync(self):
+        now = time.monotonic()
+        interval = getattr(settings, 'TOKEN_BLACKLIST_SYNC_SECONDS', 2)
+        if self.bloom is not None and now - self.synced_at < interval:
+            return
+        with self.lock:
+            self.gaps = {gap: seen for gap, seen in self.gaps.items() if now - seen < GAP_TIMEOUT}
+            if self.bloom is None or now - self.built_at > REBUILD_SECONDS or self.bloom.count > self.bloom.capacity:
+                self._rebuild(now)
+            else:
+                pending = Q(id__gt=self.last_id)
+                if self.gaps:
+                    pending |= Q(id__in=list(self.gaps))
+                # Tokens expirados também viram lacunas (a reconstrução os ignora) e não entram no filtro
+                rows = (
+                    BlacklistedToken.objects.filter(pending, token__expires_at__gt=timezone.now())
+                    .order_by('id').values_list('id', 'token__jti')
+                )
+                self._track(rows, now)
+            self.synced_at = now
+
+    def might_contain(self, jti):
+        self._sync()
+        return jti in self.bloom
+
+    def add(self, jti):
+        self._sync()
+        with self.lock:
+            self.bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+            self.last_id = 0
+            self.gaps = {}
+
+
+blacklist_cache = BlacklistCache()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    RefreshToken que consulta o filtro antes da tabela e grava outstanding/blacklist
+    sem as buscas extras do usuário feitas pela implementação padrão.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[jwt_settings.JTI_CLAIM]
+        if not blacklist_cache.might_contain(jti):
+            return
+        if BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError('O token está na blacklist.')
+
+    def _outstanding_defaults(self):
+        return {
+            'user_id': self.payload.get(jwt_settings.USER_ID_CLAIM),
+            'created_at': self.current_time,
+            'token': str(self),
+            'expires_at': datetime_from_epoch(self.payload['exp']),
+        }
+
+    def blacklist(self):
+        jti = self.payload[jwt_settings.JTI_CLAIM]
+        token, _ = OutstandingToken.objects.get_or_create(jti=jti, defaults=self._outstanding_defaults())
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_cache.add(jti)
+        return result
+
+    def outstand(self):
+        # Chamado logo depois de set_jti(): o jti é novo, então não precisa de get_or_create
+        return OutstandingToken.objects.create(jti=self.payload[jwt_settings.JTI_CLAIM], **self._outstanding_defaults())
+
+
+class CachedBlacklistTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedBlacklistRefreshToken
@@ -1,15 +1,40 @@
 # backend/core/views.py
 
+import csv
+import json
+import math
+from datetime import datetime, timedelta
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from django.utils.dateparse import parse_date
 from dj_rest_auth.registration.views import RegisterView # Importe
 from .serializers import ProducerRegisterSerializer      # Importe
 
 # --- ADICIONE ESTES IMPORTS ---
 from rest_framework import viewsets, permissions, generics, status
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
-from .models import Product, ProducerProfile, Order, OrderItem, Rating
-from .serializers import ProductSerializer, ProducerProfileSerializer, OrderSerializer, OrderStatusUpdateSerializer, RatingSerializer
+from .models import Product, ProducerProfile, Order, OrderItem, Rating, ProducerNotification, normalize_phone
+from .serializers import ProductSerializer, ProducerProfileSerializer, OrderSerializer, OrderStatusUpdateSerializer, OrderBulkStatusSerializer, RatingSerializer, ProducerRatingSummarySerializer, ProductSearchSerializer, ProducerSearchSerializer, ProducerNearbySerializer, ProducerNotificationSerializer
+from .stock import order_quantities, release_stock
+from .pagination import ProductCursorPagination, ProducerCursorPagination, OrderCursorPagination, RatingCursorPagination, SearchCursorPagination, NotificationCursorPagination
+from .search import search_queryset
+from .parsers import CSVTextParser
+from .product_import import parse_csv, upsert_products
+from .geo import bounding_box, city_key, haversine_km, locate_city
+from .mixins import CatalogCacheMixin, ConditionalListMixin
+from .throttling import OrderLookupThrottle
+from .catalog_cache import PRODUCER_SCOPE
+from .analytics import record_status_change, sales_summary
+from .outbox import enqueue_status_changes
+from .instrumentation import registry as request_metrics
 
 def index(request):
     return render(request, 'index.html')
@@ -19,10 +44,11 @@ class ProducerRegisterView(RegisterView):
     serializer_class = ProducerRegisterSerializer
     
 # --- ADICIONE A VIEWSET ABAIXO ---
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     # Garante que apenas usuários logados possam acessar esta API.
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ProductCursorPagination
 
     def get_queryset(self):
         """
@@ -44,6 +70,37 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, CSVTextParser, MultiPartParser])
+    def bulk_upsert(self, request):
+        """
+        Cria ou atualiza vários produtos de uma vez.
+        POST /api/products/bulk_upsert/ com:
+        - JSON: lista de produtos (ou {"products": [...]})
+        - CSV: corpo text/csv ou arquivo no campo 'file' (colunas id,name,category,status,stock,price)
+        Linhas com 'id' (ou com o nome de um produto existente) atualizam; as demais criam.
+        ?skip_invalid=true grava as linhas válidas mesmo se outras tiverem erro.
+        """
+        data = request.data
+        if 'file' in request.FILES:
+            rows = parse_csv(request.FILES['file'].read().decode('utf-8-sig'))
+        elif isinstance(data, str):
+            rows = parse_csv(data)
+        elif isinstance(data, dict) and isinstance(data.get('products'), list):
+            rows = data['products']
+        elif isinstance(data, list):
+            rows = data
+        else:
+            return Response(
+                {"detail": "Envie uma lista de produtos em JSON ou um CSV."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        skip_invalid = request.query_params.get('skip_invalid', '').lower() in ('1', 'true')
+        result = upsert_products(request.user, rows, skip_invalid=skip_invalid)
+        written = result['created'] or result['updated']
+        response_status = status.HTTP_400_BAD_REQUEST if result['errors'] and not written else status.HTTP_200_OK
+        return Response(result, status=response_status)
+
     def get_object(self):
         """
         Sobrescreve o método para garantir que o usuário só possa
@@ -57,7 +114,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Você não tem permissão para acessar este produto.")
         return obj
     
-class ProducerListView(generics.ListAPIView):
+class ProducerListView(CatalogCacheMixin, generics.ListAPIView):
     """
     View para listar todos os perfis de produtores cadastrados.
     Acessível por qualquer usuário (com ou sem autenticação).
@@ -65,33 +122,106 @@ class ProducerListView(generics.ListAPIView):
     """
     serializer_class = ProducerProfileSerializer
     permission_classes = [permissions.AllowAny] # Permite acesso sem autenticação
+    pagination_class = ProducerCursorPagination
 
     def get_queryset(self):
         """
         Retorna apenas perfis de produtores válidos.
         Exclui usuários staff, superusers e perfis sem dados completos.
+        Usuário, categorias e avaliações vêm na mesma consulta.
+        Aceita ?city= para filtrar pela cidade normalizada (sem acento/UF).
         """
-        return ProducerProfile.objects.filter(
-            user__is_staff=False,
-            user__is_superuser=False
-        ).order_by('name')
+        producers = ProducerProfile.objects.directory()
+        city = self.request.query_params.get('city')
+        if city:
+            producers = producers.filter(city_key=city_key(city))
+        return producers.order_by('name')
+
+class ProducerNearbyView(CatalogCacheMixin, generics.ListAPIView):
+    """
+    Produtores dentro de um raio, do mais próximo para o mais distante.
+    GET /api/producers/nearby/?lat=-22.9&lon=-47.06&radius_km=30
+    GET /api/producers/nearby/?city=Campinas&radius_km=30  (centro da cidade pelo gazetteer)
+    O banco filtra pelo retângulo que contém o círculo (índice latitude/longitude);
+    a distância exata só é calculada para esses candidatos.
+    """
+    serializer_class = ProducerNearbySerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
+    default_radius_km = 25
+    max_radius_km = 500
+    max_limit = 100
+
+    def get_center(self):
+        from rest_framework.exceptions import ValidationError
+        params = self.request.query_params
+        if params.get('lat') and params.get('lon'):
+            try:
+                latitude, longitude = float(params['lat']), float(params['lon'])
+            except ValueError:
+                raise ValidationError({"detail": "lat e lon devem ser números."})
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValidationError({"detail": "Coordenadas inválidas."})
+            return latitude, longitude
+        if params.get('city'):
+            location = locate_city(params['city'])
+            if location is None:
+                raise ValidationError({"city": "Cidade não encontrada."})
+            return location
+        raise ValidationError({"detail": "Informe lat e lon ou city."})
+
+    def get_number(self, name, default, maximum, cast=float):
+        from rest_framework.exceptions import ValidationError
+        try:
+            value = cast(self.request.query_params.get(name, default))
+        except ValueError:
+            raise ValidationError({name: "Deve ser um número inteiro." if cast is int else "Deve ser um número."})
+        # float() aceita 'nan' e 'inf'
+        if not math.isfinite(value):
+            raise ValidationError({name: "Deve ser um número finito."})
+        if value <= 0:
+            raise ValidationError({name: "Deve ser maior que zero."})
+        return min(value, maximum)
+
+    def get_queryset(self):
+        latitude, longitude = self.get_center()
+        radius_km = self.get_number('radius_km', self.default_radius_km, self.max_radius_km)
+        limit = self.get_number('limit', 50, self.max_limit, cast=int)
+        lat_min, lat_max, lon_min, lon_max = bounding_box(latitude, longitude, radius_km)
 
-class ProducerDetailView(generics.RetrieveAPIView):
+        candidates = ProducerProfile.objects.directory().filter(
+            latitude__range=(lat_min, lat_max),
+            longitude__range=(lon_min, lon_max),
+        )
+        nearby = []
+        for producer in candidates:
+            producer.distance_km = haversine_km(latitude, longitude, producer.latitude, producer.longitude)
+            if producer.distance_km <= radius_km:
+                nearby.append(producer)
+        nearby.sort(key=lambda producer: (producer.distance_km, producer.name))
+        return nearby[:limit]
+
+class ProducerDetailView(CatalogCacheMixin, generics.RetrieveAPIView):
     """
     View para obter detalhes de um produtor específico.
     Acessível por qualquer usuário (com ou sem autenticação).
     """
-    queryset = ProducerProfile.objects.all()
     serializer_class = ProducerProfileSerializer
     permission_classes = [permissions.AllowAny]
+    cache_scope = PRODUCER_SCOPE
+
+    def get_queryset(self):
+        return ProducerProfile.objects.with_categories()
 
-class ProducerProductsView(generics.ListAPIView):
+class ProducerProductsView(CatalogCacheMixin, generics.ListAPIView):
     """
     View para listar produtos de um produtor específico.
     Acessível por qualquer usuário (com ou sem autenticação).
     """
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProductCursorPagination
+    cache_scope = PRODUCER_SCOPE
 
     def get_queryset(self):
         producer_id = self.kwargs.get('pk')
@@ -103,6 +233,67 @@ class ProducerProductsView(generics.ListAPIView):
         except ProducerProfile.DoesNotExist:
             return Product.objects.none()
 
+class ProducerRatingSummaryView(CatalogCacheMixin, generics.RetrieveAPIView):
+    """
+    Resumo das avaliações de um produtor: média, total, distribuição por nota
+    e os comentários mais recentes (?recent=, padrão 5, máximo 20).
+    GET /api/producers/{id}/ratings/summary/
+    Os números vêm dos agregados mantidos no perfil e os comentários de um índice
+    parcial, então o custo não depende de quantas avaliações o produtor tem.
+    """
+    serializer_class = ProducerRatingSummarySerializer
+    permission_classes = [permissions.AllowAny]
+    cache_scope = PRODUCER_SCOPE
+    queryset = ProducerProfile.objects.all()
+
+    DEFAULT_RECENT = 5
+    MAX_RECENT = 20
+
+    def get_object(self):
+        profile = super().get_object()
+        try:
+            limit = int(self.request.query_params.get('recent', self.DEFAULT_RECENT))
+        except ValueError:
+            limit = self.DEFAULT_RECENT
+        limit = min(max(limit, 0), self.MAX_RECENT)
+        # Mesma condição do índice rating_commented_idx
+        profile.recent_reviews = list(
+            Rating.objects.filter(producer_id=profile.user_id, comment__gt='')
+            .order_by('-created_at', '-id')[:limit]
+        ) if limit else []
+        return profile
+
+class SearchView(generics.ListAPIView):
+    """
+    Busca textual pública em produtos ativos e produtores.
+    GET /api/search/?q=tomate orgânico&type=products|producers
+    Ignora acentos, maiúsculas e plurais simples; resultados ordenados por relevância.
+    """
+    permission_classes = [permissions.AllowAny]
+    pagination_class = SearchCursorPagination
+
+    def get_search_type(self):
+        search_type = self.request.query_params.get('type', 'products')
+        if search_type not in ('products', 'producers'):
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({"type": "Use 'products' ou 'producers'."})
+        return search_type
+
+    def get_serializer_class(self):
+        if self.get_search_type() == 'producers':
+            return ProducerSearchSerializer
+        return ProductSearchSerializer
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '')
+        if self.get_search_type() == 'producers':
+            return search_queryset(ProducerProfile.objects.directory(), query)
+        products = Product.objects.filter(
+            status='Ativo',
+            owner__producer_profile__isnull=False
+        ).select_related('owner__producer_profile')
+        return search_queryset(products, query)
+
 class MyProducerProfileView(generics.RetrieveUpdateAPIView):
     """
     View para obter e atualizar o perfil do produtor logado.
@@ -123,7 +314,26 @@ class MyProducerProfileView(generics.RetrieveUpdateAPIView):
             from rest_framework.exceptions import NotFound
             raise NotFound("Perfil de produtor não encontrado para este usuário.")
 
-class OrderViewSet(viewsets.ModelViewSet):
+class Echo:
+    """Buffer falso para o csv.writer: devolve a linha em vez de guardá-la."""
+
+    def write(self, value):
+        return value
+
+EXPORT_CHUNK_ROWS = 500
+
+async def _async_rows(rows, chunk_size=EXPORT_CHUNK_ROWS):
+    """
+    Versão assíncrona de um gerador de linhas para o StreamingHttpResponse sob ASGI
+    (que acumularia o gerador síncrono inteiro antes de enviar). O ORM continua
+    síncrono: cada bloco de linhas é lido na thread da requisição.
+    """
+    iterator = iter(rows)
+    next_chunk = sync_to_async(lambda: ''.join(islice(iterator, chunk_size)), thread_sensitive=True)
+    while chunk := await next_chunk():
+        yield chunk
+
+class OrderViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar pedidos.
     - Clientes podem criar pedidos (POST sem autenticação)
@@ -131,6 +341,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     """
     serializer_class = OrderSerializer
     permission_classes = [permissions.AllowAny]  # Permite criação sem autenticação
+    pagination_class = OrderCursorPagination
 
     def get_queryset(self):
         """
@@ -138,17 +349,34 @@ class OrderViewSet(viewsets.ModelViewSet):
         Se houver um parâmetro client_phone, filtra por telefone do cliente.
         Caso contrário, retorna vazio.
         """
-        # Permite buscar pedidos por telefone do cliente (para clientes não autenticados)
+        # Produtor, avaliação e itens usados pelo OrderSerializer vêm junto,
+        # então a listagem faz um número fixo de consultas por página
+        orders = Order.objects.select_related(
+            'producer__producer_profile', 'rating'
+        ).prefetch_related('items')
+
+        # Permite buscar pedidos por telefone do cliente (para clientes não autenticados);
+        # a busca usa a chave normalizada, então '(11) 98765-4321' e '11987654321' coincidem
         client_phone = self.request.query_params.get('client_phone', None)
         if client_phone:
-            return Order.objects.filter(client_phone=client_phone).order_by('-created_at')
+            phone_key = normalize_phone(client_phone)
+            if not phone_key:
+                return Order.objects.none()
+            return orders.filter(client_phone_key=phone_key).order_by('-created_at')
 
         # Para produtores autenticados, mostra apenas seus pedidos
         if self.request.user.is_authenticated:
-            return Order.objects.filter(producer=self.request.user).order_by('-created_at')
+            return orders.filter(producer=self.request.user).order_by('-created_at')
 
         return Order.objects.none()
 
+    def get_validator_aggregates(self):
+        """Avaliações também aparecem na listagem (has_rating/rating_score)."""
+        aggregates = super().get_validator_aggregates()
+        aggregates['last_rating'] = Max('rating__created_at')
+        aggregates['ratings'] = Count('rating')
+        return aggregates
+
     def get_permissions(self):
         """
         Define permissões por ação:
@@ -160,6 +388,12 @@ class OrderViewSet(viewsets.ModelViewSet):
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def get_throttles(self):
+        """Consulta anônima por telefone: limitada por IP e no total do processo."""
+        if self.action == 'list' and 'client_phone' in self.request.query_params and not self.request.user.is_authenticated:
+            return [OrderLookupThrottle()]
+        return super().get_throttles()
+
     @action(detail=True, methods=['patch'], permission_classes=[permissions.IsAuthenticated])
     def update_status(self, request, pk=None):
         """
@@ -175,11 +409,257 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
-        if serializer.is_valid():
+        with transaction.atomic():
+            # Trava o pedido para que dois cancelamentos simultâneos não devolvam o estoque duas vezes
+            order = Order.objects.select_for_update().get(pk=order.pk)
+            previous_status = order.status
+
+            serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             serializer.save()
-            return Response(OrderSerializer(order).data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            # Cancelar devolve o estoque reservado (Cancelado é final, então não há reabertura)
+            if order.status == 'Cancelado' and previous_status != 'Cancelado' and order.stock_reserved:
+                release_stock(order_quantities(order.items.all()))
+                order.stock_reserved = False
+                order.save(update_fields=['stock_reserved'])
+
+            record_status_change({order.pk: previous_status}, order.status)
+            enqueue_status_changes(order.producer_id, {order.pk: previous_status}, order.status)
+
+        return Response(OrderSerializer(order).data)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def bulk_update_status(self, request):
+        """
+        Atualiza o status de vários pedidos do produtor logado de uma vez.
+        POST /api/orders/bulk_update_status/  {"ids": [1, 2, 3], "status": "Aceito"}
+        Retorna o resultado de cada id em vez dos pedidos completos.
+        """
+        serializer = OrderBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+        new_status = serializer.validated_data['status']
+        allowed_from = [
+            current for current, targets in Order.STATUS_TRANSITIONS.items() if new_status in targets
+        ]
+
+        with transaction.atomic():
+            # Apenas pedidos do próprio produtor; os demais aparecem como não encontrados
+            rows = list(
+                Order.objects.select_for_update()
+                .filter(producer=request.user, id__in=ids)
+                .values_list('id', 'status', 'stock_reserved')
+            )
+            current_statuses = {order_id: current for order_id, current, _ in rows}
+            reserved_ids = {order_id for order_id, _, reserved in rows if reserved}
+            valid_ids = [order_id for order_id, current in current_statuses.items() if current in allowed_from]
+
+            if valid_ids:
+                updates = {'status': new_status, 'updated_at': timezone.now()}
+                if new_status == 'Cancelado':
+                    updates['stock_reserved'] = False
+                Order.objects.filter(
+                    producer=request.user, id__in=valid_ids, status__in=allowed_from
+                ).update(**updates)
+
+                # Só devolve o estoque dos pedidos que o reservaram na criação
+                release_ids = [order_id for order_id in valid_ids if order_id in reserved_ids]
+                if new_status == 'Cancelado' and release_ids:
+                    quantities = dict(
+                        OrderItem.objects.filter(order_id__in=release_ids)
+                        .values('product_id').annotate(total=Sum('quantity'))
+                        .values_list('product_id', 'total')
+                    )
+                    release_stock(quantities)
+
+                changes = {order_id: current_statuses[order_id] for order_id in valid_ids}
+                record_status_change(changes, new_status)
+                enqueue_status_changes(request.user.pk, changes, new_status)
+
+        results = []
+        for order_id in sorted(ids):
+            if order_id not in current_statuses:
+                results.append({"id": order_id, "result": "not_found"})
+            elif order_id in valid_ids:
+                results.append({"id": order_id, "result": "updated"})
+            elif current_statuses[order_id] == new_status:
+                # Já está no status pedido: nada a fazer (o mesmo que update_status aceita)
+                results.append({"id": order_id, "result": "unchanged"})
+            else:
+                results.append({
+                    "id": order_id,
+                    "result": "invalid_transition",
+                    "current_status": current_statuses[order_id],
+                })
+
+        return Response({"status": new_status, "updated": len(valid_ids), "results": results})
+
+    EXPORT_COLUMNS = [
+        'order_id', 'created_at', 'status', 'client_name', 'client_phone', 'client_email',
+        'total_price', 'product_id', 'product_name', 'quantity', 'unit_price', 'subtotal',
+    ]
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        """
+        Exporta o histórico de pedidos do produtor logado, em streaming.
+        GET /api/orders/export/?output=csv|ndjson&start=2025-01-01&end=2025-12-31
+        CSV: uma linha por item do pedido. NDJSON: um pedido (com itens) por linha.
+        Os pedidos são lidos em blocos, então a memória não cresce com o histórico.
+        Sob ASGI as linhas saem por um iterador assíncrono; sob WSGI, pelo gerador.
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in ('csv', 'ndjson'):
+            return Response({"output": "Use 'csv' ou 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = Order.objects.filter(producer=request.user)
+        for param, lookup, days in (('start', 'created_at__gte', 0), ('end', 'created_at__lt', 1)):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            day = parse_date(value)
+            if day is None:
+                return Response({param: "Data inválida. Use AAAA-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+            # Limites como datetime (e não created_at__date) para usar o índice por produtor/data
+            boundary = timezone.make_aware(datetime.combine(day + timedelta(days=days), datetime.min.time()))
+            orders = orders.filter(**{lookup: boundary})
+
+        orders = orders.prefetch_related('items').order_by('created_at', 'id').iterator(chunk_size=500)
+
+        if output == 'ndjson':
+            rows = self._export_ndjson(orders)
+            content_type = 'application/x-ndjson'
+        else:
+            rows = self._export_csv(orders)
+            content_type = 'text/csv; charset=utf-8'
+
+        if isinstance(request._request, ASGIRequest):
+            rows = _async_rows(rows)
+        response = StreamingHttpResponse(rows, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="pedidos.{output}"'
+        return response
+
+    def _export_csv(self, orders):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.EXPORT_COLUMNS)
+        for order in orders:
+            for item in order.items.all():
+                yield writer.writerow([
+                    order.id, order.created_at.isoformat(), order.status, order.client_name,
+                    order.client_phone, order.client_email or '', order.total_price,
+                    item.product_id, item.product_name, item.quantity, item.unit_price, item.subtotal,
+                ])
+
+    def _export_ndjson(self, orders):
+        for order in orders:
+            record = {
+                'order_id': order.id,
+                'created_at': order.created_at.isoformat(),
+                'status': order.status,
+                'client_name': order.client_name,
+                'client_phone': order.client_phone,
+                'client_email': order.client_email,
+                'total_price': str(order.total_price),
+                'items': [
+                    {
+                        'product_id': item.product_id,
+                        'product_name': item.product_name,
+                        'quantity': item.quantity,
+                        'unit_price': str(item.unit_price),
+                        'subtotal': str(item.subtotal),
+                    }
+                    for item in order.items.all()
+                ],
+            }
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+
+class SalesAnalyticsView(generics.GenericAPIView):
+    """
+    Resumo de vendas do produtor logado, lido dos resumos diários (não dos pedidos).
+    GET /api/analytics/sales/?start=2025-01-01&end=2025-01-31&top=10
+    Sem datas, considera os últimos 30 dias. Os pedidos entram pelo dia em que foram feitos.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 731
+    MAX_TOP = 50
+
+    def get(self, request):
+        today = timezone.localdate()
+        dates = {}
+        for param, default in (('end', today), ('start', None)):
+            value = request.query_params.get(param)
+            if not value:
+                dates[param] = default
+                continue
+            dates[param] = parse_date(value)
+            if dates[param] is None:
+                return Response({param: "Data inválida. Use AAAA-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        end = dates['end']
+        start = dates['start'] or end - timedelta(days=self.DEFAULT_DAYS - 1)
+
+        if start > end:
+            return Response({"start": "A data inicial deve ser anterior à final."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= self.MAX_DAYS:
+            return Response({"start": f"Intervalo máximo de {self.MAX_DAYS} dias."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            top = max(1, min(int(request.query_params.get('top', 10)), self.MAX_TOP))
+        except ValueError:
+            return Response({"top": "Informe um número inteiro."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(sales_summary(request.user, start, end, top=top))
+
+
+class RequestMetricsView(generics.GenericAPIView):
+    """
+    Métricas por rota coletadas pelo RequestMetricsMiddleware neste processo.
+    GET /api/metrics/requests/ lista; DELETE zera. Apenas administradores.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(request_metrics.snapshot())
+
+    def delete(self, request):
+        request_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Notificações do produtor logado, geradas pelo worker do outbox (run_outbox_worker).
+    GET /api/notifications/?after=<id> traz apenas as mais novas que o id informado.
+    """
+    serializer_class = ProducerNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        notifications = ProducerNotification.objects.filter(producer=self.request.user)
+        after = self.request.query_params.get('after')
+        if after and after.isdigit():
+            notifications = notifications.filter(id__gt=int(after))
+        return notifications
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """
+        Marca como lidas as notificações até o id informado (ou todas).
+        POST /api/notifications/mark_read/  {"up_to": 42}
+        """
+        notifications = ProducerNotification.objects.filter(producer=request.user, read_at__isnull=True)
+        up_to = request.data.get('up_to')
+        if up_to is not None:
+            try:
+                notifications = notifications.filter(id__lte=int(up_to))
+            except (TypeError, ValueError):
+                return Response({"up_to": "Informe o id de uma notificação."}, status=status.HTTP_400_BAD_REQUEST)
+        updated = notifications.update(read_at=timezone.now())
+        return Response({"updated": updated})
+
 
 class RatingViewSet(viewsets.ModelViewSet):
     """
@@ -189,15 +669,18 @@ class RatingViewSet(viewsets.ModelViewSet):
     """
     serializer_class = RatingSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = RatingCursorPagination
 
     def get_queryset(self):
         """
         Retorna avaliações filtradas por produtor se especificado.
         """
+        # producer_name vem do perfil: JOIN em vez de uma consulta por avaliação
+        ratings = Rating.objects.select_related('producer__producer_profile')
         producer_id = self.request.query_params.get('producer_id', None)
         if producer_id:
-            return Rating.objects.filter(producer__producer_profile__id=producer_id).order_by('-created_at')
-        return Rating.objects.all().order_by('-created_at')
+            return ratings.filter(producer__producer_profile__id=producer_id).order_by('-created_at')
+        return ratings.order_by('-created_at')
 
     def create(self, request, *args, **kwargs):
         """
@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import { IonIcon } from '@ionic/react';
 import { close } from 'ionicons/icons';
 import apiClient from '@/lib/axiosConfig';
+import { fetchAllPages } from '@/lib/pagination';
 import styles from './ClientOrdersModal.module.css';
 
 interface OrderItem {
@@ -94,8 +95,8 @@ export function ClientOrdersModal({ isOpen, onClose }: ClientOrdersModalProps) {
             }
 
             const { phone } = JSON.parse(clientInfo);
-            const response = await apiClient.get(`/api/orders/?client_phone=${phone}`);
-            setOrders(response.data);
+            const clientOrders = await fetchAllPages<Order>(apiClient, `/api/orders/?client_phone=${phone}`);
+            setOrders(clientOrders);
         } catch (err) {
             console.error("Erro ao buscar pedidos:", err);
             setError("Não foi possível carregar seus pedidos.");
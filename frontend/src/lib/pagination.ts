@@ -0,0 +1,28 @@
+// frontend/src/lib/pagination.ts
+
+import type { AxiosInstance, AxiosRequestConfig } from 'axios';
+
+// Formato das respostas paginadas por cursor da API
+export interface CursorPage<T> {
+    next: string | null;
+    previous: string | null;
+    results: T[];
+}
+
+// Percorre todas as páginas de um endpoint paginado seguindo o link 'next'
+export async function fetchAllPages<T>(client: AxiosInstance, url: string, config?: AxiosRequestConfig): Promise<T[]> {
+    const items: T[] = [];
+    let nextUrl: string | null = url;
+
+    while (nextUrl) {
+        const response = await client.get<CursorPage<T> | T[]>(nextUrl, config);
+        // Compatível com endpoints que ainda retornam listas simples
+        if (Array.isArray(response.data)) {
+            return response.data;
+        }
+        items.push(...response.data.results);
+        nextUrl = response.data.next;
+    }
+
+    return items;
+}
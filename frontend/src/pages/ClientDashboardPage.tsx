@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from "react";
 import apiClient from "@/lib/axiosConfig";
+import { fetchAllPages } from "@/lib/pagination";
 import { DashboardTopbar } from "@/components/DashboardTopbar";
 import { FilterBar } from "@/components/FilterBar";
 import { ProducerCard } from "@/components/ProducerCard"; // Importa o novo card
@@ -65,24 +66,10 @@ export function ClientDashboardPage() {
             setLoading(true);
             setError(null);
             try {
-                const response = await apiClient.get('/api/producers/');
-                console.log('API Response:', response.data);
-                console.log('Response status:', response.status);
-                console.log('Is array?', Array.isArray(response.data));
-
-                // Verifica se a resposta é um array
-                if (Array.isArray(response.data)) {
-                    console.log('Setando produtores:', response.data);
-                    setProducers(response.data);
-                } else if (response.data && Array.isArray(response.data.results)) {
-                    // Caso a API retorne um objeto com chave 'results'
-                    console.log('Setando produtores (results):', response.data.results);
-                    setProducers(response.data.results);
-                } else {
-                    console.error("API response is not an array:", response.data);
-                    setError("Formato de dados inesperado recebido do servidor.");
-                    setProducers([]);
-                }
+                // A API é paginada por cursor; percorre todas as páginas
+                const producerList = await fetchAllPages<ProducerProfileData>(apiClient, '/api/producers/');
+                console.log('Setando produtores:', producerList);
+                setProducers(producerList);
             } catch (err) {
                 // Só mostra erro se não for erro de autenticação
                 const error = err as { response?: { status?: number } };
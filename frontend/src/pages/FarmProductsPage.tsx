@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import apiClient from "@/lib/axiosConfig";
+import { fetchAllPages } from "@/lib/pagination";
 import { DashboardTopbar } from "@/components/DashboardTopbar";
 import { Footer } from "@/components/Footer";
 import { useCart } from "@/contexts/CartContext";
@@ -59,8 +60,8 @@ export function FarmProductsPage() {
                 setProducer(producerResponse.data);
 
                 // Buscar produtos do produtor
-                const productsResponse = await apiClient.get(`/api/producers/${producerId}/products/`);
-                setProducts(productsResponse.data);
+                const producerProducts = await fetchAllPages<ProductData>(apiClient, `/api/producers/${producerId}/products/`);
+                setProducts(producerProducts);
             } catch (err) {
                 console.error("Erro ao buscar dados:", err);
                 const error = err as { response?: { status?: number } };
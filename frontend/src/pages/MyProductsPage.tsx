@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from "react";
 import axiosInstance from "@/lib/axiosConfig";
+import { fetchAllPages } from "@/lib/pagination";
 import { Sidebar } from "@/components/layout/Sidebar";
 import { Header } from "@/components/layout/Header";
 import { ProductForm } from "@/components/forms/ProductForm";
@@ -33,8 +34,8 @@ export function MyProductsPage() {
         setLoading(true);
         setError(null);
         try {
-            const response = await axiosInstance.get('/api/products/');
-            setProducts(response.data);
+            const productList = await fetchAllPages<Product>(axiosInstance, '/api/products/');
+            setProducts(productList);
         } catch (err: any) {
             // Se for erro 401, o interceptor já vai redirecionar para login
             if (err.response?.status !== 401) {
@@ -1,6 +1,7 @@
 // frontend/src/pages/OrdersPage.tsx
 import { useState, useEffect } from "react";
 import axiosInstance from "@/lib/axiosConfig";
+import { fetchAllPages } from "@/lib/pagination";
 import { Sidebar } from "@/components/layout/Sidebar";
 import { Header } from "@/components/layout/Header";
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from "@/components/ui/card";
@@ -57,8 +58,8 @@ export function OrdersPage() {
         setLoading(true);
         setError(null);
         try {
-            const response = await axiosInstance.get('/api/orders/');
-            setOrders(response.data);
+            const orderList = await fetchAllPages<Order>(axiosInstance, '/api/orders/');
+            setOrders(orderList);
         } catch (err: any) {
             if (err.response?.status !== 401) {
                 setError("Não foi possível carregar os pedidos.");
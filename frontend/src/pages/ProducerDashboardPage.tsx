@@ -8,6 +8,7 @@ import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@
 import { Badge } from "@/components/ui/badge";
 import { BarChart, Bar, XAxis, YAxis, Tooltip, ResponsiveContainer } from 'recharts';
 import axios from 'axios';
+import { fetchAllPages } from '@/lib/pagination';
 import styles from '../styles/modules/ProducerDashboardPage.module.css';
 
 // Interfaces
@@ -63,14 +64,12 @@ export function ProducerDashboardPage() {
             const headers = { 'Authorization': `Token ${token}` };
 
             // Buscar dados em paralelo
-            const [ordersRes, productsRes, profileRes] = await Promise.all([
-                axios.get('http://127.0.0.1:8000/api/orders/', { headers }),
-                axios.get('http://127.0.0.1:8000/api/products/', { headers }),
+            const [orders, products, profileRes] = await Promise.all([
+                fetchAllPages<Order>(axios, 'http://127.0.0.1:8000/api/orders/', { headers }),
+                fetchAllPages<Product>(axios, 'http://127.0.0.1:8000/api/products/', { headers }),
                 axios.get('http://127.0.0.1:8000/api/my-profile/', { headers })
             ]);
 
-            const orders: Order[] = ordersRes.data;
-            const products: Product[] = productsRes.data;
             const profile: ProducerProfile = profileRes.data;
 
             // Calcular métricas